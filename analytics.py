@@ -0,0 +1,214 @@
+# Kolonnu analītika: lietotāja transakcijas NumPy masīvos (centi int64, dienas int32, ienākumu maska),
+# periodu kopsummas tiek aprēķinātas ar prefiksu summām un bināro meklēšanu
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import NamedTuple
+
+import numpy as np
+
+import repository
+from money import euros
+
+MAX_USERS = 32
+# Dienu un nedēļu rindām: garākam intervālam tiek atgrieztas tikai pēdējās MAX_SERIES_DAYS dienas
+MAX_SERIES_DAYS = 3660
+EPOCH = date(1970, 1, 1)
+WEEKDAYS = ("Pirmdiena", "Otrdiena", "Trešdiena", "Ceturtdiena", "Piektdiena", "Sestdiena", "Svētdiena")
+
+
+def to_day(value):
+    return (date.fromisoformat(value) - EPOCH).days
+
+
+def from_day(day):
+    return (EPOCH + timedelta(days=int(day))).isoformat()
+
+
+# 1970-01-01 bija ceturtdiena; 0 - pirmdiena
+def _weekday(days):
+    return (days + 3) % 7
+
+
+class Columns(NamedTuple):
+    days: np.ndarray
+    cents: np.ndarray
+    income: np.ndarray
+    income_prefix: np.ndarray
+    expense_prefix: np.ndarray
+    income_count_prefix: np.ndarray
+
+
+def _columns(days, cents, income):
+    income_cents = np.where(income, cents, 0)
+    zero = np.zeros(1, np.int64)
+    return Columns(days, cents, income,
+                   np.concatenate((zero, np.cumsum(income_cents))),
+                   np.concatenate((zero, np.cumsum(cents - income_cents))),
+                   np.concatenate((zero, np.cumsum(income, dtype=np.int64))))
+
+
+EMPTY = _columns(np.empty(0, np.int32), np.empty(0, np.int64), np.empty(0, bool))
+
+
+# Viena lietotāja dati; columns tiek aizstāts vienā piešķiršanā, tāpēc lasītājiem nav vajadzīga slēdzene
+class UserSeries:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.version = None
+        self.max_id = 0
+        self.columns = EMPTY
+        self._lock = threading.Lock()
+
+    def _load(self, after_id):
+        ids, days, cents, income = [], [], [], []
+        for rows in repository.iter_transaction_columns(self.user_id, after_id):
+            chunk_ids, chunk_dates, chunk_income, chunk_amounts = zip(*rows)
+            ids.append(np.array(chunk_ids, np.int64))
+            days.append(np.array(chunk_dates, "datetime64[D]").astype(np.int32))
+            income.append(np.array(chunk_income, bool))
+            cents.append(np.array(chunk_amounts, np.int64))
+        if not ids:
+            return None
+        ids, days, cents, income = (np.concatenate(part) for part in (ids, days, cents, income))
+        order = np.argsort(days, kind="stable")
+        return int(ids.max()), days[order], cents[order], income[order]
+
+    # Jaunas rindas parasti ir jaunākas par esošajām, tad tās tiek pievienotas beigās bez pārkārtošanas
+    def _merge(self, base, new):
+        if not len(base.days) or new[0][0] >= base.days[-1]:
+            return _columns(*(np.concatenate(pair) for pair in zip(base[:3], new)))
+        days, cents, income = (np.concatenate(pair) for pair in zip(base[:3], new))
+        order = np.argsort(days, kind="stable")
+        return _columns(days[order], cents[order], income[order])
+
+    # Salīdzina ar trigeru uzturētajām kopsummām; atšķirība nozīmē dzēstas vai labotas rindas
+    def _matches(self, columns):
+        totals = repository.lifetime_totals(self.user_id)
+        return (len(columns.days) == repository.transaction_count(self.user_id)
+                and int(columns.income_prefix[-1]) == totals.income
+                and int(columns.expense_prefix[-1]) == totals.expense)
+
+    # Datu versija mainās ar katru ierakstu; pēc tās tiek ielādētas tikai jaunās rindas (id > max_id)
+    def sync(self):
+        version = repository.data_version(self.user_id)
+        if version == self.version:
+            return self.columns
+        with self._lock:
+            if version == self.version:
+                return self.columns
+            columns = self.columns
+            loaded = self._load(self.max_id)
+            if loaded:
+                self.max_id, *new = loaded
+                columns = self._merge(columns, new)
+            if not self._matches(columns):
+                loaded = self._load(0)
+                self.max_id, *new = loaded if loaded else (0, *EMPTY[:3])
+                columns = _columns(*new)
+            self.columns = columns
+            self.version = version
+            return columns
+
+
+_series = OrderedDict()
+_series_lock = threading.Lock()
+
+
+def series(user_id):
+    user_id = int(user_id)
+    with _series_lock:
+        user_series = _series.get(user_id)
+        if user_series is None:
+            user_series = _series[user_id] = UserSeries(user_id)
+            if len(_series) > MAX_USERS:
+                _series.popitem(last=False)
+        else:
+            _series.move_to_end(user_id)
+    return user_series
+
+
+# Pieprasītais intervāls, sašaurināts līdz lietotāja datiem; None, ja tajā nav datu
+def _bounds(columns, date_from, date_to):
+    if not len(columns.days):
+        return None
+    start = max(to_day(date_from), int(columns.days[0])) if date_from else int(columns.days[0])
+    end = min(to_day(date_to), int(columns.days[-1])) if date_to else int(columns.days[-1])
+    return (start, end) if start <= end else None
+
+
+def _series_bounds(columns, date_from, date_to):
+    bounds = _bounds(columns, date_from, date_to)
+    if bounds is None:
+        return None
+    start, end = bounds
+    return max(start, end - MAX_SERIES_DAYS + 1), end
+
+
+def _span(columns, start, end):
+    return (int(np.searchsorted(columns.days, start, "left")),
+            int(np.searchsorted(columns.days, end, "right")))
+
+
+def range_totals(user_id, date_from=None, date_to=None):
+    columns = series(user_id).sync()
+    bounds = _bounds(columns, date_from, date_to)
+    if bounds is None:
+        return {"from": date_from, "to": date_to, "income": 0, "expense": 0, "balance": 0,
+                "count": 0, "income_count": 0, "expense_count": 0}
+    lo, hi = _span(columns, *bounds)
+    income = columns.income_prefix[hi] - columns.income_prefix[lo]
+    expense = columns.expense_prefix[hi] - columns.expense_prefix[lo]
+    income_count = columns.income_count_prefix[hi] - columns.income_count_prefix[lo]
+    return {"from": from_day(bounds[0]), "to": from_day(bounds[1]),
+            "income": euros(income), "expense": euros(expense), "balance": euros(income - expense),
+            "count": hi - lo, "income_count": int(income_count), "expense_count": int(hi - lo - income_count)}
+
+
+# Slīdošais vidējais pa dienām: katras dienas loga summa ir divu prefiksu starpība
+def rolling_average(user_id, window=30, date_from=None, date_to=None):
+    columns = series(user_id).sync()
+    bounds = _series_bounds(columns, date_from, date_to)
+    if bounds is None:
+        return []
+    days = np.arange(bounds[0], bounds[1] + 1)
+    hi = np.searchsorted(columns.days, days, "right")
+    lo = np.searchsorted(columns.days, days - window, "right")
+    income = (columns.income_prefix[hi] - columns.income_prefix[lo]) / (window * 100)
+    expense = (columns.expense_prefix[hi] - columns.expense_prefix[lo]) / (window * 100)
+    return [{"date": from_day(day), "income": round(i, 2), "expense": round(e, 2)}
+            for day, i, e in zip(days.tolist(), income.tolist(), expense.tolist())]
+
+
+def weekday_breakdown(user_id, date_from=None, date_to=None):
+    columns = series(user_id).sync()
+    bounds = _bounds(columns, date_from, date_to)
+    income, expense, counts = (np.zeros(7, np.int64) for _ in range(3))
+    if bounds is not None:
+        lo, hi = _span(columns, *bounds)
+        weekdays = _weekday(columns.days[lo:hi])
+        cents = columns.cents[lo:hi]
+        is_income = columns.income[lo:hi]
+        # bincount ar svariem summē float64; centi tiek summēti kā int64
+        np.add.at(income, weekdays[is_income], cents[is_income])
+        np.add.at(expense, weekdays[~is_income], cents[~is_income])
+        counts = np.bincount(weekdays, minlength=7)
+    return [{"weekday": name, "income": euros(i), "expense": euros(e), "count": int(n)}
+            for name, i, e, n in zip(WEEKDAYS, income.tolist(), expense.tolist(), counts.tolist())]
+
+
+# Nedēļas (no pirmdienas) kopsummas: nedēļu robežas tiek atrastas ar searchsorted
+def weekly_breakdown(user_id, date_from=None, date_to=None):
+    columns = series(user_id).sync()
+    bounds = _series_bounds(columns, date_from, date_to)
+    if bounds is None:
+        return []
+    start, end = bounds
+    week_starts = np.arange(start - _weekday(start), end + 1, 7)
+    edges = np.clip(week_starts, start, None)
+    idx = np.searchsorted(columns.days, np.append(edges, end + 1), "left")
+    income = np.diff(columns.income_prefix[idx])
+    expense = np.diff(columns.expense_prefix[idx])
+    counts = np.diff(idx)
+    return [{"week": from_day(week), "income": euros(i), "expense": euros(e), "count": int(n)}
+            for week, i, e, n in zip(week_starts.tolist(), income.tolist(), expense.tolist(), counts.tolist())]
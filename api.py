@@ -0,0 +1,394 @@
+# Flask API: lasīšanas galapunkti un transakciju ielāde, bez tkinter un atskaišu bibliotēkām
+import functools
+import json
+import time
+from datetime import datetime
+from flask import Blueprint, Flask, request, jsonify, Response, send_file, url_for
+import auth
+import db
+import jobs
+import metrics
+import migrations
+import repository
+import sessions
+from cache import LRUCache
+from money import euros
+
+bp = Blueprint("api", __name__)
+
+STREAM_CHUNK_SIZE = 500
+SUMMARY_CACHE_BYTES = 8 * 1024 * 1024
+
+summary_cache = LRUCache(max_bytes=SUMMARY_CACHE_BYTES)
+
+def not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+def bearer_token():
+    header = request.headers.get("Authorization", "")
+    scheme, _, token = header.partition(" ")
+    return token.strip() if scheme.lower() == "bearer" else ""
+
+# Lietotājs no parakstīta sesijas marķiera (Authorization: Bearer); skatam tiek nodots kā pirmais arguments
+def authenticated(view):
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        user_id = sessions.verify_token(bearer_token())
+        if user_id is None:
+            response = jsonify({"error": "Authentication required"})
+            response.headers["WWW-Authenticate"] = "Bearer"
+            return response, 401
+        return view(user_id, *args, **kwargs)
+    return wrapper
+
+# Pieteikšanās: bcrypt pārbaude notiek tikai šeit, pārējie pieprasījumi izmanto marķieri.
+# Ja mainīts BCRYPT_ROUNDS, parole tiek pārjaukta ar jauno izmaksu faktoru
+@bp.route("/api/login", methods=["POST"])
+def login():
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not isinstance(body.get("username"), str) \
+            or not isinstance(body.get("password"), str):
+        return jsonify({"error": "Username and password required"}), 400
+    user = repository.find_user(body["username"].strip())
+    if user is None or not auth.check_password(body["password"], user[1]):
+        return jsonify({"error": "Invalid username or password"}), 401
+    if auth.needs_rehash(user[1]):
+        repository.update_password(user[0], auth.hash_password(body["password"]))
+    token, expires = sessions.issue_token(user[0])
+    return jsonify({"token": token, "expires": expires, "user_id": user[0]})
+
+@bp.route("/api/logout", methods=["POST"])
+def logout():
+    if not sessions.revoke_token(bearer_token()):
+        return jsonify({"error": "Authentication required"}), 401
+    return Response(status=204)
+
+# Transakciju filtru nolasīšana no pieprasījuma (limit, after=datums,id, from, to, type)
+def parse_transaction_filters(user_id, args):
+    limit = args.get("limit")
+    if limit is not None:
+        limit = int(limit)
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+
+    after = args.get("after")
+    if after:
+        if after.count(",") != 1:
+            raise ValueError("after must be <date>,<id>")
+        after_date, after_id = after.split(",")
+        datetime.strptime(after_date, "%Y-%m-%d")
+        after = (after_date, int(after_id))
+
+    for name in ("from", "to"):
+        if args.get(name):
+            datetime.strptime(args[name], "%Y-%m-%d")
+
+    trans_type = args.get("type")
+    if trans_type and trans_type not in ("income", "expense"):
+        raise ValueError("type must be income or expense")
+
+    filters = repository.transaction_filter(user_id, after=after,
+                                            date_from=args.get("from"), date_to=args.get("to"),
+                                            trans_type=trans_type)
+    return filters, limit
+
+# Summas datubāzē ir centos, API atbildēs - eiro skaitļi (12.3), tāpat kā ielādē
+def with_euros(row, index):
+    return row[:index] + [euros(row[index])] + row[index + 1:]
+
+def stream_transactions(filters, limit):
+    yield "["
+    first = True
+    for rows in repository.iter_transaction_chunks(filters, limit, STREAM_CHUNK_SIZE):
+        chunk = ",".join(json.dumps((row[0], euros(row[1]), row[2], row[3])) for row in rows)
+        yield chunk if first else "," + chunk
+        first = False
+    yield "]"
+
+@bp.route("/api/transactions", methods=["GET"])
+@authenticated
+def get_transactions(user_id):
+    try:
+        filters, limit = parse_transaction_filters(user_id, request.args)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {e}"}), 400
+
+    etag = f"{user_id}-{repository.data_version(user_id)}"
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+
+    response = Response(stream_transactions(filters, limit), mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    if limit:
+        next_cursor = repository.next_transaction_cursor(filters, limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = f"{next_cursor[0]},{next_cursor[1]}"
+    return response
+
+INGEST_BATCH_SIZE = 1000
+MAX_INGEST_ERRORS = 100
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+# NDJSON tiek lasīts no pieprasījuma plūsmas pa rindai, viss ķermenis netiek turēts atmiņā
+def ndjson_records(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError:
+            yield None, ValueError("invalid JSON")
+
+# Rindas tiek pārbaudītas tāpat kā GUI un ierakstītas pa daļām (executemany, viena transakcija daļai);
+# idempotences atslēga tiek glabāta import_hash kolonnā, tāpēc atkārtots pieprasījums rindas nedublē
+def ingest_transactions(user_id, records, request_key=None, batch_size=INGEST_BATCH_SIZE):
+    result = {"accepted": 0, "duplicates": 0, "rejected": 0, "batches": [], "errors": []}
+    today = datetime.now().strftime("%Y-%m-%d")
+    batch = []
+    rejected = 0
+
+    def flush():
+        inserted = repository.insert_transactions(batch) if batch else 0
+        stats = {"accepted": inserted, "duplicates": len(batch) - inserted, "rejected": rejected}
+        result["batches"].append(stats)
+        for name, value in stats.items():
+            result[name] += value
+
+    for index, (record, error) in enumerate(records):
+        try:
+            if error is not None:
+                raise error
+            if not isinstance(record, dict):
+                raise ValueError("row must be a JSON object")
+            row = repository.validate_transaction(record.get("type"), record.get("amount"),
+                                                  record.get("description"), record.get("date") or today)
+            key = record.get("idempotency_key")
+            if key is None and request_key:
+                key = f"{request_key}:{index}"
+            batch.append((user_id,) + row + (f"api:{key}" if key is not None else None,))
+        except ValueError as e:
+            rejected += 1
+            if len(result["errors"]) < MAX_INGEST_ERRORS:
+                result["errors"].append({"row": index, "error": str(e)})
+        if len(batch) + rejected >= batch_size:
+            flush()
+            batch = []
+            rejected = 0
+    if batch or rejected or not result["batches"]:
+        flush()
+    return result
+
+# Transakciju ielāde: JSON masīvs vai NDJSON plūsma; galvene Idempotency-Key ļauj droši atkārtot pieprasījumu
+@bp.route("/api/transactions", methods=["POST"])
+@authenticated
+def post_transactions(user_id):
+    if request.mimetype in NDJSON_TYPES:
+        records = ndjson_records(request.stream)
+    else:
+        body = request.get_json(silent=True)
+        if not isinstance(body, list):
+            return jsonify({"error": "Body must be a JSON array or NDJSON"}), 400
+        records = ((record, None) for record in body)
+    return jsonify(ingest_transactions(user_id, records, request.headers.get("Idempotency-Key")))
+
+CHANGES_LIMIT = 1000
+MAX_CHANGES_LIMIT = 10000
+
+# Delta sinhronizācija: klients atkārto pieprasījumu ar since=next&epoch=epoch, kamēr more ir true
+@bp.route("/api/changes", methods=["GET"])
+@authenticated
+def get_changes(user_id):
+    try:
+        since = int(request.args.get("since", 0))
+        limit = int(request.args.get("limit", CHANGES_LIMIT))
+        epoch = int(request.args["epoch"]) if request.args.get("epoch") else None
+        if since < 0 or not 0 < limit <= MAX_CHANGES_LIMIT:
+            raise ValueError(f"since must be >= 0, limit 1..{MAX_CHANGES_LIMIT}")
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {e}"}), 400
+    changes = repository.changes_since(user_id, since, limit, epoch)
+    changes["transactions"] = [with_euros(row, 2) for row in changes["transactions"]]
+    changes["budget_limits"] = [with_euros(row, 2) for row in changes["budget_limits"]]
+    return jsonify(changes)
+
+SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 500
+
+# Aprakstu meklēšana ar FTS5; rezultāti pēc atbilstības, nākamās lapas sākums galvenē X-Next-Offset
+@bp.route("/api/transactions/search", methods=["GET"])
+@authenticated
+def search_transactions(user_id):
+    query = request.args.get("q", "")
+    if not repository.search_match(query):
+        return jsonify({"error": "Search query required"}), 400
+    try:
+        limit = int(request.args.get("limit", SEARCH_LIMIT))
+        offset = int(request.args.get("offset", 0))
+        if not 0 < limit <= MAX_SEARCH_LIMIT or offset < 0:
+            raise ValueError(f"limit must be 1..{MAX_SEARCH_LIMIT}, offset >= 0")
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {e}"}), 400
+
+    etag = f"{user_id}-{repository.data_version(user_id)}"
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+
+    rows = repository.search_transactions(user_id, query, limit + 1, offset)
+    response = jsonify([with_euros(list(row), 2) for row in rows[:limit]])
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    if len(rows) > limit:
+        response.headers["X-Next-Offset"] = str(offset + limit)
+    return response
+
+@bp.route("/api/summary", methods=["GET"])
+@authenticated
+def get_summary(user_id):
+    # Kopsavilkums ir atkarīgs arī no tekošā mēneša, tāpēc tas ir daļa no ETag un keša atslēgas
+    current_month = datetime.now().strftime("%Y-%m")
+    version = repository.data_version(user_id)
+    etag = f"{user_id}-{version}-{current_month}"
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+
+    key = (user_id, version, current_month)
+    payload = summary_cache.get(key)
+    if payload is None:
+        data = repository.summary(user_id, current_month)
+        for name in ("total_income", "total_expense", "budget_limit"):
+            data[name] = euros(data[name])
+        data["monthly_data"] = [(month, euros(income), euros(expense)) for month, income, expense in data["monthly_data"]]
+        start = time.perf_counter()
+        payload = json.dumps(data).encode("utf-8")
+        metrics.SERIALIZE.observe(time.perf_counter() - start, "summary")
+        summary_cache.put(key, payload)
+
+    response = Response(payload, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+# Analītikas atbildes no kolonnu masīviem; ETag ir lietotāja datu versija, jo URL jau nosaka vaicājumu.
+# Modulis (un NumPy) tiek ielādēts tikai pirmajā analītikas pieprasījumā
+ANALYTICS = {
+    "totals": "range_totals",
+    "rolling": "rolling_average",
+    "weekdays": "weekday_breakdown",
+    "weekly": "weekly_breakdown",
+}
+
+@bp.route("/api/analytics/<name>", methods=["GET"])
+@authenticated
+def get_analytics(user_id, name):
+    if name not in ANALYTICS:
+        return jsonify({"error": "Unknown analytics"}), 404
+    kwargs = {"date_from": request.args.get("from"), "date_to": request.args.get("to")}
+    try:
+        for value in kwargs.values():
+            if value:
+                datetime.strptime(value, "%Y-%m-%d")
+        if kwargs["date_from"] and kwargs["date_to"] and kwargs["date_from"] > kwargs["date_to"]:
+            raise ValueError("from must not be after to")
+        if name == "rolling":
+            kwargs["window"] = int(request.args.get("window", 30))
+            if not 0 < kwargs["window"] <= 3660:
+                raise ValueError("window must be 1..3660 days")
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {e}"}), 400
+
+    etag = f"{user_id}-{repository.data_version(user_id)}"
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+    import analytics
+
+    response = jsonify(getattr(analytics, ANALYTICS[name])(user_id, **kwargs))
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+# Atskaišu darbi: POST iesniedz (202 ar Location), GET atgriež stāvokli un progresu, /download - gatavo failu,
+# DELETE atceļ nepabeigtu vai dzēš pabeigtu darbu. Atskaites veido atsevišķi procesi, nevis API darba pavedieni
+@bp.route("/api/reports", methods=["POST"])
+@authenticated
+def post_report(user_id):
+    body = request.get_json(silent=True)
+    report_format = body.get("format") if isinstance(body, dict) else None
+    try:
+        job_id = jobs.submit(user_id, report_format)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if job_id is None:
+        return jsonify({"error": "Too many active report jobs"}), 429
+    response = jsonify(jobs.status(job_id, user_id))
+    response.status_code = 202
+    response.headers["Location"] = url_for("api.get_report", job_id=job_id)
+    return response
+
+@bp.route("/api/reports/<job_id>", methods=["GET"])
+@authenticated
+def get_report(user_id, job_id):
+    job = jobs.status(job_id, user_id)
+    if job is None:
+        return jsonify({"error": "Report not found"}), 404
+    if job["status"] == "done":
+        job["download"] = url_for("api.download_report", job_id=job_id)
+    response = jsonify(job)
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+@bp.route("/api/reports/<job_id>/download", methods=["GET"])
+@authenticated
+def download_report(user_id, job_id):
+    job = jobs.status(job_id, user_id)
+    if job is None:
+        return jsonify({"error": "Report not found"}), 404
+    if job["status"] in jobs.ACTIVE:
+        return jsonify({"error": "Report is not ready", "status": job["status"]}), 409
+    path = jobs.artifact(job_id, user_id)
+    if path is None:
+        return jsonify({"error": "Report is no longer available", "status": job["status"]}), 410
+    return send_file(path, as_attachment=True, download_name=f"budzets.{job['format']}")
+
+@bp.route("/api/reports/<job_id>", methods=["DELETE"])
+@authenticated
+def delete_report(user_id, job_id):
+    if not jobs.cancel(job_id, user_id):
+        return jsonify({"error": "Report not found"}), 404
+    return Response(status=204)
+
+# Lietotnes rūpnīca; WSGI/ASGI serveri to izsauc katrā darba procesā (gunicorn "api:create_app()")
+def create_app(db_path=None, pool_size=None):
+    if db_path is not None or pool_size is not None:
+        db.configure(path=db_path, pool_size=pool_size)
+    # Savienojumi netiek aizvērti: GUI režīmā (gui --api) tos vienlaikus lieto citi pavedieni. Pirms fork()
+    # pūlu atjauno gunicorn post_fork un `main.py serve`
+    migrations.migrate()
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    metrics.init_app(app)
+    return app
+
+_server = None
+
+# Izstrādes serveris (GUI fona pavediens vai `serve --server dev`); stop_flask to aptur un aizver savienojumus
+def run_flask(host="127.0.0.1", port=5000, app=None):
+    global _server
+    from werkzeug.serving import make_server
+
+    _server = make_server(host, port, app or create_app(), threaded=True)
+    try:
+        _server.serve_forever()
+    finally:
+        _server.server_close()
+        jobs.shutdown()
+        db.close_all()
+
+# Jāizsauc no cita pavediena, nevis no tā, kurā darbojas serve_forever
+def stop_flask():
+    if _server is not None:
+        _server.shutdown()
@@ -0,0 +1,308 @@
+# Slēgto gadu arhīvs: katra gada transakcijas tiek pārvietotas atsevišķā SQLite failā, ko vaicājumi pievieno
+# ar ATTACH tikai tad, ja to datumu intervāls skar šo gadu. Arhīva faili netiek mainīti - katra pārbūve izveido
+# jaunu paaudzi <gads>.<paaudze>.db, un tabula archives norāda aktuālo. SQLite ļauj pievienot ne vairāk kā
+# MAX_ATTACHED failus, tāpēc, kad tie visi ir aizņemti, jaunais gads tiek ierakstīts tuvākā arhīva failā
+# (faila nosaukumā ir tā pirmais gads)
+import os
+import pathlib
+import re
+import sqlite3
+import stat
+from contextlib import contextmanager
+from datetime import date
+
+import db
+
+ARCHIVE_DIR = os.environ.get("BUDGET_ARCHIVE_DIR")
+# 2 - summas veselos centos (1 - REAL eiro)
+ARCHIVE_FORMAT = 2
+# SQLITE_MAX_ATTACHED noklusējums
+MAX_ATTACHED = 10
+COPY_CHUNK_SIZE = 5000
+COLUMNS = "id, user_id, type, amount, description, date, import_hash"
+FILE_PATTERN = re.compile(r"^\d{4}\.\d+\.db$")
+
+# Tie paši indeksi, ko izmanto aktīvās tabulas vaicājumi, un FTS indekss meklēšanai
+ARCHIVE_SCHEMA = (
+    "CREATE INDEX idx_transactions_user_date ON transactions(user_id, date)",
+    "CREATE INDEX idx_transactions_user_type_date ON transactions(user_id, type, date, amount)",
+    "CREATE INDEX idx_transactions_user_amount ON transactions(user_id, amount)",
+    "CREATE INDEX idx_transactions_user_description ON transactions(user_id, description)",
+    '''CREATE UNIQUE INDEX idx_transactions_import_hash
+        ON transactions(user_id, import_hash) WHERE import_hash IS NOT NULL''',
+    '''CREATE VIRTUAL TABLE transactions_fts USING fts5(
+        description, content='transactions', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')''',
+    "INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')",
+    "INSERT INTO transactions_fts (transactions_fts) VALUES ('optimize')",
+    "ANALYZE",
+    f"PRAGMA user_version = {ARCHIVE_FORMAT}",
+)
+
+
+def archive_dir():
+    if ARCHIVE_DIR:
+        return os.path.abspath(ARCHIVE_DIR)
+    return os.path.splitext(os.path.abspath(db.DB_PATH))[0] + "-archive"
+
+
+# "2023.4.db" -> "archive_2023_4"
+def _schema(file):
+    return "archive_" + file[:-3].replace(".", "_")
+
+
+def _registered(conn, date_from=None, date_to=None):
+    first = int(date_from[:4]) if date_from else 0
+    last = int(date_to[:4]) if date_to else 9999
+    return [file for file, in conn.execute('''SELECT file FROM archives WHERE year BETWEEN ? AND ?
+                                           GROUP BY file ORDER BY MIN(year)''', (first, last))]
+
+
+# Arhīva faili ar to gadiem: [(gadi, fails, paaudze)] gadu secībā
+def _groups(conn):
+    groups = {}
+    for year, file, generation in conn.execute("SELECT year, file, generation FROM archives ORDER BY year"):
+        groups.setdefault((file, generation), []).append(year)
+    return [(years, file, generation) for (file, generation), years in groups.items()]
+
+
+# Gadi, kas tiek pārbūvēti vienā failā kopā ar year, un to pašreizējā paaudze (0 - jauns fails). Ja citu failu
+# jau ir MAX_ATTACHED, tiek apvienots ar tuvāko (vienādā attālumā - ar agrāko)
+def _group(conn, year):
+    groups = _groups(conn)
+    own = next((group for group in groups if year in group[0]), None)
+    if own is not None:
+        groups.remove(own)
+    years, generation = (own[0], own[2]) if own else ([year], 0)
+    if len(groups) < MAX_ATTACHED:
+        return years, generation
+    nearest = min(groups, key=lambda group: (min(abs(a - b) for a in group[0] for b in years), group[0][0]))
+    return sorted(nearest[0] + years), max(nearest[2], generation)
+
+
+# Datumu nosacījums gadu sarakstam (viena faila gadi var nebūt pēc kārtas)
+def _in_years(years):
+    where = " OR ".join(["(date >= ? AND date < ?)"] * len(years))
+    return f"({where})", [bound for year in years for bound in (f"{year}-01-01", f"{year + 1}-01-01")]
+
+
+# Tā paša gada vecās paaudzes tiek atvienotas vienmēr, citi arhīvi - tikai ja pietrūkst vietas jaunajiem
+def _attach(conn, files):
+    wanted = {_schema(file): file for file in files}
+    years = {name.rsplit("_", 1)[0] for name in wanted}
+    attached = [row[1] for row in conn.execute("PRAGMA database_list") if row[1].startswith("archive_")]
+    spare = MAX_ATTACHED - len(attached) - len([name for name in wanted if name not in attached])
+    for name in attached:
+        if name in wanted or (spare >= 0 and name.rsplit("_", 1)[0] not in years):
+            continue
+        try:
+            conn.execute(f"DETACH DATABASE {name}")
+            spare += 1
+        except sqlite3.OperationalError:
+            # To vēl izmanto nepabeigts vaicājums šajā savienojumā
+            pass
+    for name, file in wanted.items():
+        if name not in attached:
+            uri = pathlib.Path(archive_dir(), file).as_uri() + "?mode=ro&immutable=1"
+            conn.execute(f"ATTACH DATABASE ? AS {name}", (uri,))
+
+
+# Vaicājumiem pār aktīvo tabulu un arhīviem: atgriež shēmu sarakstu ("main" un intervālu skarošie arhīvi).
+# Reģistrs un dati tiek lasīti vienā transakcijā, tāpēc vienlaicīga arhivēšana nevar paslēpt vai dublēt rindas
+@contextmanager
+def partitions(conn, date_from=None, date_to=None, begin="BEGIN"):
+    own = not conn.in_transaction
+    while True:
+        if own:
+            conn.execute(begin)
+        files = _registered(conn, date_from, date_to)
+        if not files:
+            break
+        if len(files) > MAX_ATTACHED:
+            if own:
+                conn.rollback()
+            raise sqlite3.OperationalError("Pārāk daudz arhīva failu; tos apvieno `python main.py compact-archives`")
+        attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+        if all(_schema(file) in attached for file in files):
+            break
+        if not own:
+            raise sqlite3.OperationalError("Arhīvu nevar pievienot jau sāktā transakcijā")
+        # ATTACH nav atļauts transakcijas laikā
+        conn.rollback()
+        _attach(conn, files)
+    schemas = ["main"] + [_schema(file) for file in files]
+    if not own:
+        yield schemas
+        return
+    try:
+        yield schemas
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+
+# FROM daļa ar visām transakciju kolonnām; ar vairākām shēmām SQLite apvieno kārtotus UNION ALL zarus
+def source(schemas):
+    if len(schemas) == 1:
+        return "transactions"
+    return "(" + " UNION ALL ".join(f"SELECT {COLUMNS} FROM {schema}.transactions" for schema in schemas) + ")"
+
+
+def _remove(path):
+    try:
+        os.chmod(path, stat.S_IRUSR | stat.S_IWUSR)
+        os.remove(path)
+    except OSError:
+        # Windows neļauj dzēst failu, ko vēl tur atvērtu kāds savienojums; to izdzēsīs nākamā kompaktēšana
+        pass
+
+
+def _register(conn, years, file, generation, counts):
+    conn.executemany('''INSERT INTO archives (year, file, generation, rows) VALUES (?, ?, ?, ?)
+                     ON CONFLICT (year) DO UPDATE SET
+                         file = excluded.file, generation = excluded.generation, rows = excluded.rows''',
+                     [(year, file, generation, counts[year]) for year in years])
+
+
+# Jauns arhīva fails no src rindām norādītajos gados; rindas tiek ierakstītas id secībā, indeksi pēc tam.
+# Atgriež rindu skaitu katrā gadā
+def _build(conn, path, src, years):
+    if os.path.exists(path):
+        _remove(path)
+    out = sqlite3.connect(path)
+    try:
+        out.execute('''CREATE TABLE transactions (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER,
+                    type TEXT,
+                    amount INTEGER,
+                    description TEXT,
+                    date TEXT NOT NULL,
+                    import_hash TEXT)''')
+        where, params = _in_years(years)
+        cursor = conn.execute(f"SELECT {COLUMNS} FROM {src} WHERE {where} ORDER BY id", params)
+        while True:
+            rows = cursor.fetchmany(COPY_CHUNK_SIZE)
+            if not rows:
+                break
+            out.executemany(f"INSERT OR IGNORE INTO transactions ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        for statement in ARCHIVE_SCHEMA:
+            out.execute(statement)
+        counts = dict(out.execute('''SELECT CAST(substr(date, 1, 4) AS INTEGER), COUNT(*)
+                                  FROM transactions GROUP BY 1'''))
+        out.commit()
+    finally:
+        out.close()
+    os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+    return {year: counts.get(year, 0) for year in years}
+
+
+# Dzēš arhīva mapes failus, kas nav reģistrā (vecās paaudzes un neizdevušos pārbūvju atliekas)
+def _cleanup(conn):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        registered = {file for file, in conn.execute("SELECT file FROM archives")}
+        for file in os.listdir(archive_dir()):
+            if FILE_PATTERN.match(file) and file not in registered:
+                _remove(os.path.join(archive_dir(), file))
+    finally:
+        conn.commit()
+
+
+# Pārvieto gada rindas no aktīvās tabulas uz jaunu arhīva paaudzi kopā ar jau arhivētajām un pārējiem tā paša
+# faila gadiem. Atgriež (pārvietoto rindu skaits, rindu skaits arhīva failā)
+def archive_year(year):
+    if year >= date.today().year:
+        raise ValueError(f"{year}. gads vēl nav noslēgts")
+    os.makedirs(archive_dir(), exist_ok=True)
+    with db.connection() as conn:
+        while True:
+            years, generation = _group(conn, year)
+            with partitions(conn, f"{years[0]}-01-01", f"{years[-1]}-12-31", begin="BEGIN IMMEDIATE") as schemas:
+                # Vienlaicīga arhivēšana varēja mainīt grupas pirms transakcijas sākuma
+                if _group(conn, year) != (years, generation):
+                    continue
+                registered = conn.execute("SELECT 1 FROM archives WHERE year = ?", (year,)).fetchone()
+                if not registered and not conn.execute('''SELECT 1 FROM main.transactions
+                                                       WHERE date >= ? AND date < ? LIMIT 1''',
+                                                       (f"{year}-01-01", f"{year + 1}-01-01")).fetchone():
+                    return 0, 0
+                generation += 1
+                file = f"{years[0]}.{generation}.db"
+                counts = _build(conn, os.path.join(archive_dir(), file), source(schemas), years)
+                where, params = _in_years(years)
+                conn.execute("INSERT INTO archive_moves (active) VALUES (1)")
+                moved = conn.execute(f"DELETE FROM main.transactions WHERE {where}", params).rowcount
+                conn.execute("DELETE FROM archive_moves")
+                _register(conn, years, file, generation, counts)
+            break
+        _cleanup(conn)
+    return moved, sum(counts.values())
+
+
+# Arhivē visus gadus pirms before (noklusējumā aktīvi paliek tekošais un iepriekšējais gads)
+def archive_before(before=None):
+    before = before or date.today().year - 1
+    if before > date.today().year:
+        raise ValueError(f"{before - 1}. gads vēl nav noslēgts")
+    with db.connection() as conn:
+        years = [year for year, in conn.execute('''SELECT DISTINCT CAST(substr(date, 1, 4) AS INTEGER)
+                                                FROM main.transactions WHERE date < ? ORDER BY 1''',
+                                                (f"{before}-01-01",))]
+    return {year: archive_year(year) for year in years}
+
+
+# Migrācijai: vecā formāta arhīviem tiek izveidota jauna paaudze, summas pārrēķinot centos. Faili tiek lasīti
+# tieši (ATTACH transakcijas laikā nav atļauts), reģistrs tiek mainīts migrācijas transakcijā c;
+# vecos failus izdzēš nākamā arhivēšana vai kompaktēšana
+def upgrade(c):
+    for years, file, generation in _groups(c):
+        uri = pathlib.Path(archive_dir(), file).as_uri() + "?mode=ro"
+        old = sqlite3.connect(uri, uri=True)
+        try:
+            if old.execute("PRAGMA user_version").fetchone()[0] >= ARCHIVE_FORMAT:
+                continue
+            src = '''(SELECT id, user_id, type, CAST(ROUND(amount * 100) AS INTEGER) AS amount,
+                  description, date, import_hash FROM transactions)'''
+            upgraded = f"{years[0]}.{generation + 1}.db"
+            counts = _build(old, os.path.join(archive_dir(), upgraded), src, years)
+        finally:
+            old.close()
+        _register(c, years, upgraded, generation + 1, counts)
+
+
+# Arhivēto rindu mēneša kopsummas (user_id, month, income, expense, count) migrācijām, kuru transakcijā c
+# arhīvus nevar pievienot ar ATTACH
+def monthly_totals(c):
+    rows = []
+    for _, file, _ in _groups(c):
+        archived = sqlite3.connect(pathlib.Path(archive_dir(), file).as_uri() + "?mode=ro", uri=True)
+        try:
+            rows += archived.execute('''SELECT user_id, substr(date, 1, 7),
+                                     SUM(CASE WHEN type='income' THEN amount ELSE 0 END),
+                                     SUM(CASE WHEN type='expense' THEN amount ELSE 0 END),
+                                     COUNT(*)
+                                     FROM transactions GROUP BY 1, 2''').fetchall()
+        finally:
+            archived.close()
+    return rows
+
+
+# Pārbūvē katru arhīva failu: pievieno vēlāk ievadītās tā gadu rindas, no jauna izveido indeksus un statistiku
+# un apvieno failus, ja to ir vairāk par MAX_ATTACHED. vacuum=True pēc tam saspiež arī aktīvo datubāzi
+def compact(vacuum=False):
+    with db.connection() as conn:
+        first_years = [years[0] for years, _, _ in _groups(conn)]
+    result = {}
+    for year in first_years:
+        with db.connection() as conn:
+            # Jau pārbūvēts kopā ar iepriekšējo failu
+            if any(year in years and years[0] != year for years, _, _ in _groups(conn)):
+                continue
+        result[year] = archive_year(year)
+    if vacuum:
+        with db.connection() as conn:
+            conn.execute("VACUUM")
+    return result
@@ -0,0 +1,23 @@
+# ASGI ieejas punkts (uvicorn, hypercorn): python main.py serve --server uvicorn
+# Galapunkti paliek sinhroni, jo sqlite3 bloķē; adapteris tos izpilda pavedienu pūlā, nebloķējot notikumu cilpu
+from asgiref.wsgi import WsgiToAsgi
+
+from api import create_app
+
+
+# WsgiToAsgi neizsauc atbildes close(), tāpēc bez šī netiktu reģistrētas pieprasījumu metrikas (call_on_close)
+# un straumēto sarakstu ģeneratori neatbrīvotu savienojumus. Cikls, nevis yield from: tas, pārtraucot iterāciju
+# (Content-Length sasniegts), pats izsauktu close() vēlreiz
+def _closing(wsgi_app):
+    def app(environ, start_response):
+        response = wsgi_app(environ, start_response)
+        try:
+            for chunk in response:
+                yield chunk
+        finally:
+            if hasattr(response, "close"):
+                response.close()
+    return app
+
+
+app = WsgiToAsgi(_closing(create_app()))
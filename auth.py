@@ -0,0 +1,31 @@
+# Paroļu jaukšana ar bcrypt un tās izmaksu faktora iestatījums
+import os
+import time
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.environ.get("BUDGET_BCRYPT_ROUNDS", "12"))
+
+
+def hash_password(password, rounds=None):
+    salt = bcrypt.gensalt(rounds or BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def check_password(password, stored_hash):
+    return bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
+
+
+# Jaucējs izveidots ar citu izmaksu faktoru nekā pašreizējais BCRYPT_ROUNDS ("$2b$12$...")
+def needs_rehash(stored_hash, rounds=None):
+    return int(stored_hash.split("$")[2]) != (rounds or BCRYPT_ROUNDS)
+
+
+# Izmēra vidējo jaukšanas laiku katram izmaksu faktoram, lai varētu izvēlēties BCRYPT_ROUNDS
+def benchmark_bcrypt(rounds_range=range(10, 15), repeat=3):
+    results = {}
+    for rounds in rounds_range:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            hash_password("benchmark-password", rounds)
+        results[rounds] = (time.perf_counter() - start) / repeat
+    return results
@@ -0,0 +1,358 @@
+# Sintētisko datu ģenerators un ātrdarbības mērījumi galvenajām darbībām (API, saraksts, atskaites)
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import auth
+import db
+import migrations
+import repository
+from money import Money
+
+SEED = 42
+BATCH_SIZE = 5000
+VISIBLE_ROWS = 25
+REGRESSION_THRESHOLD = 1.2
+
+# (apraksts, svars, vidējā summa); summas tiek ģenerētas ar log-normālo sadalījumu ap vidējo
+INCOME_CATEGORIES = (("Alga", 0.55, 1800), ("Prēmija", 0.1, 400), ("Ārštata darbs", 0.2, 250),
+                     ("Atmaksa", 0.1, 30), ("Procenti", 0.05, 5))
+EXPENSE_CATEGORIES = (("Pārtika", 0.32, 25), ("Kafejnīca", 0.14, 8), ("Degviela", 0.1, 45),
+                      ("Sabiedriskais transports", 0.09, 3), ("Komunālie maksājumi", 0.05, 90),
+                      ("Īre", 0.03, 450), ("Apģērbs", 0.07, 40), ("Izklaide", 0.1, 20),
+                      ("Veselība", 0.05, 30), ("Mobilais sakars", 0.05, 15))
+INCOME_SHARE = 0.08
+
+
+# Summa centos
+def _amount(rng, mean):
+    return max(1, round(mean * 100 * rng.lognormvariate(0, 0.5)))
+
+
+def _bench_user(index):
+    username = f"bench{index:03d}"
+    user = repository.find_user(username)
+    if user is None:
+        repository.create_user(username, auth.hash_password("bench", rounds=4))
+        user = repository.find_user(username)
+    return user[0]
+
+
+# Aizpilda datubāzi ar atkārtojamiem datiem; transactions - transakciju skaits katram lietotājam
+def generate(users=1, transactions=1000, months=36, seed=SEED, end=date(2025, 12, 31),
+             batch_size=BATCH_SIZE, progress=None):
+    rng = random.Random(seed)
+    start = end - timedelta(days=months * 30)
+    span = (end - start).days
+    income_names, income_weights, income_means = zip(*INCOME_CATEGORIES)
+    expense_names, expense_weights, expense_means = zip(*EXPENSE_CATEGORIES)
+
+    user_ids = []
+    for index in range(users):
+        user_id = _bench_user(index)
+        user_ids.append(user_id)
+
+        batch = []
+        for written in range(transactions):
+            trans_date = (start + timedelta(days=rng.randrange(span + 1))).isoformat()
+            if rng.random() < INCOME_SHARE:
+                category = rng.choices(range(len(income_names)), income_weights)[0]
+                row = ("income", _amount(rng, income_means[category]), income_names[category])
+            else:
+                category = rng.choices(range(len(expense_names)), expense_weights)[0]
+                row = ("expense", _amount(rng, expense_means[category]), expense_names[category])
+            batch.append((user_id,) + row + (trans_date, None))
+            if len(batch) == batch_size:
+                repository.insert_transactions(batch)
+                batch = []
+                if progress:
+                    progress(index, written + 1)
+        if batch:
+            repository.insert_transactions(batch)
+
+        month = date(start.year, start.month, 1)
+        while month <= end:
+            repository.set_budget_limit(user_id, month.strftime("%Y-%m"), Money.parse(round(rng.uniform(800, 2500), -1)))
+            month = (month + timedelta(days=32)).replace(day=1)
+    return user_ids
+
+
+# Flask testa klients ar lietotāja sesijas marķieri visos pieprasījumos
+def _api_client(user_id):
+    import api
+    import sessions
+
+    client = api.create_app().test_client()
+    token, _ = sessions.issue_token(user_id)
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    return client
+
+
+# Mērāmās darbības; katra sagatavošanas funkcija atgriež vienu iterāciju un apstrādāto rindu skaitu
+def _setup_get_summary(user_id, workdir):
+    import api
+
+    client = _api_client(user_id)
+
+    def run():
+        api.summary_cache.clear()
+        client.get("/api/summary").get_data()
+    return run, None
+
+
+def _setup_get_summary_cached(user_id, workdir):
+    client = _api_client(user_id)
+
+    def run():
+        client.get("/api/summary").get_data()
+    return run, None
+
+
+def _setup_get_transactions_page(user_id, workdir):
+    client = _api_client(user_id)
+
+    def run():
+        client.get("/api/transactions?limit=500").get_data()
+    return run, None
+
+
+def _setup_get_analytics(user_id, workdir):
+    client = _api_client(user_id)
+
+    def run():
+        client.get("/api/analytics/totals?from=2024-01-01&to=2024-06-30").get_data()
+        client.get("/api/analytics/weekly?from=2024-01-01&to=2024-06-30").get_data()
+    return run, None
+
+
+def _setup_get_transactions_all(user_id, workdir):
+    client = _api_client(user_id)
+
+    def run():
+        for _ in client.get("/api/transactions").response:
+            pass
+    return run, repository.transaction_count(user_id)
+
+
+# Sinhrons TaskExecutor aizstājējs: saraksta modelis vaicājumus izpilda uzreiz, nevis fona pavedienā,
+# tāpēc mērījums ietver pašus vaicājumus
+class _InlineTask:
+    cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class _InlineTasks:
+    def submit(self, fn, *args, on_done=None, on_error=None, cpu=False, silent=False):
+        result = fn(*args)
+        if on_done:
+            on_done(result)
+        return _InlineTask()
+
+
+def _list_model(user_id):
+    from gui import TransactionListModel
+
+    return TransactionListModel(user_id, _InlineTasks(), lambda: None)
+
+
+# load_transactions bez Tk logrīkiem: tās pašas kopsummas un pirmais redzamais logs
+def _setup_load_transactions(user_id, workdir):
+    model = _list_model(user_id)
+    month = datetime.now().strftime("%Y-%m")
+
+    def run():
+        repository.lifetime_totals(user_id)
+        repository.budget_limit(user_id, month)
+        model.refresh()
+        model.rows(0, VISIBLE_ROWS)
+    return run, None
+
+
+# Klikšķis uz kolonnas virsraksta un ritināšana uz saraksta vidu
+def _setup_sort_treeview(user_id, workdir):
+    model = _list_model(user_id)
+    model.refresh()
+    columns = list(model.SORT_KEYS)
+    state = {"next": 0}
+
+    def run():
+        model.set_sort(columns[state["next"] % len(columns)])
+        state["next"] += 1
+        model.rows(0, VISIBLE_ROWS)
+        model.rows(model.total // 2, VISIBLE_ROWS)
+    return run, None
+
+
+# Analīzes loga diagrammas bez keša (pirmā atvēršana pēc datu izmaiņām)
+def _setup_analysis_charts(user_id, workdir):
+    import charts
+
+    month = datetime.now().strftime("%Y-%m")
+
+    def run():
+        charts.clear_cache()
+        charts.analysis_charts(user_id, month)
+    return run, None
+
+
+def _setup_export_excel(user_id, workdir):
+    import reports
+
+    path = os.path.join(workdir, "bench.xlsx")
+    return lambda: reports.write_excel(user_id, path), repository.transaction_count(user_id)
+
+
+def _setup_export_pdf(user_id, workdir):
+    import reports
+
+    path = os.path.join(workdir, "bench.pdf")
+    return lambda: reports.write_pdf(user_id, path), repository.transaction_count(user_id)
+
+
+# (sagatavošana, noklusētais iterāciju skaits)
+OPERATIONS = {
+    "get_summary": (_setup_get_summary, 50),
+    "get_summary_cached": (_setup_get_summary_cached, 200),
+    "get_transactions_page": (_setup_get_transactions_page, 50),
+    "get_transactions_all": (_setup_get_transactions_all, 3),
+    "get_analytics": (_setup_get_analytics, 100),
+    "load_transactions": (_setup_load_transactions, 50),
+    "sort_treeview": (_setup_sort_treeview, 40),
+    "analysis_charts": (_setup_analysis_charts, 10),
+    "export_excel": (_setup_export_excel, 3),
+    "export_pdf": (_setup_export_pdf, 3),
+}
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux atgriež KiB, macOS - baitus
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Izpildās atsevišķā procesā, lai atmiņas maksimums attiektos tikai uz vienu darbību
+def _measure(name, db_path, user_id, iterations):
+    db.configure(path=db_path)
+    setup, _ = OPERATIONS[name]
+    with tempfile.TemporaryDirectory() as workdir:
+        run, rows = setup(user_id, workdir)
+        run()
+        baseline = _peak_rss_mb()
+        timings = []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+    peak = _peak_rss_mb()
+    return _summarize(timings, elapsed, rows, baseline, peak)
+
+
+def _summarize(timings, elapsed, rows, baseline, peak):
+    ms = sorted(t * 1000 for t in timings)
+    percentiles = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+    result = {
+        "iterations": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(percentiles[49], 3),
+        "p95_ms": round(percentiles[94], 3),
+        "p99_ms": round(percentiles[98], 3),
+        "max_ms": round(ms[-1], 3),
+        "ops_per_sec": round(len(ms) / elapsed, 2),
+        "peak_rss_mb": round(peak, 1) if peak is not None else None,
+        "peak_rss_growth_mb": round(peak - baseline, 1) if peak is not None else None,
+    }
+    if rows:
+        result["rows"] = rows
+        result["rows_per_sec"] = round(rows * len(ms) / elapsed)
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+# Katram izmēram izveido (vai izmanto esošu) datubāzi data_dir/bench-<rindas>.db un mēra visas darbības
+def run_benchmarks(sizes, data_dir="bench_data", operations=None, iterations=None, seed=SEED, log=print):
+    os.makedirs(data_dir, exist_ok=True)
+    operations = operations or list(OPERATIONS)
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlite": sqlite3.sqlite_version,
+            "seed": seed,
+        },
+        "results": {},
+    }
+
+    context = multiprocessing.get_context("spawn")
+    for size in sizes:
+        db_path = os.path.abspath(os.path.join(data_dir, f"bench-{size}.db"))
+        db.configure(path=db_path)
+        migrations.migrate()
+        user_id = _bench_user(0)
+        existing = repository.transaction_count(user_id)
+        if existing != size:
+            if existing:
+                log(f"{db_path}: {existing} rindas, gaidītas {size} - dzēsiet failu un palaidiet vēlreiz")
+                continue
+            log(f"Ģenerē {size} transakcijas: {db_path}")
+            generate(transactions=size, seed=seed)
+        db.close_all()
+
+        report["results"][str(size)] = results = {}
+        for name in operations:
+            count = iterations or OPERATIONS[name][1]
+            with context.Pool(1) as pool:
+                results[name] = pool.apply(_measure, (name, db_path, user_id, count))
+            r = results[name]
+            log(f"{size:>10} {name:<24} p50 {r['p50_ms']:>10.2f} ms  p95 {r['p95_ms']:>10.2f} ms  "
+                f"{r['ops_per_sec']:>9.2f} op/s  {r['peak_rss_mb']} MB")
+    return report
+
+
+# Salīdzina p95 ar iepriekšējo rezultātu failu; atgriež regresiju sarakstu (izmērs, darbība, attiecība)
+def compare(report, baseline, threshold=REGRESSION_THRESHOLD):
+    regressions = []
+    for size, results in report["results"].items():
+        for name, result in results.items():
+            old = baseline.get("results", {}).get(size, {}).get(name)
+            if not old or not old["p95_ms"]:
+                continue
+            ratio = result["p95_ms"] / old["p95_ms"]
+            if ratio > threshold:
+                regressions.append((size, name, round(ratio, 2)))
+    return regressions
+
+
+def save(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
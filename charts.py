@@ -0,0 +1,183 @@
+# Diagrammu zīmēšana ar Agg (bez Tk) PNG attēlos; attēli tiek kešoti pēc lietotāja, datu versijas un izmēra
+# atmiņā un diskā blakus atskaišu kešam, lai tos atkārtoti izmantotu arī atskaišu darba procesi
+import os
+import threading
+from io import BytesIO
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import repository
+from money import Money
+from cache import LRUCache
+
+DPI = 100
+PIE_SIZE = (600, 400)
+RECENT_SIZE = (600, 400)
+TREND_SIZE = (1200, 400)
+RECENT_MONTHS = 5
+MAX_TREND_POINTS = 36
+CHART_CACHE_BYTES = 16 * 1024 * 1024
+
+INCOME_COLOR = '#28a745'
+EXPENSE_COLOR = '#dc3545'
+
+chart_cache = LRUCache(max_bytes=CHART_CACHE_BYTES)
+
+
+def _figure(size):
+    fig = Figure(figsize=(size[0] / DPI, size[1] / DPI), dpi=DPI)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _png(fig):
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+
+# Garu vēsturi apvieno pa vairākiem mēnešiem, lai punktu skaits nepārsniegtu max_points;
+# punkts ir grupas mēneša vidējais, tāpēc nepilna pēdējā grupa nerada kritumu
+def bucket_months(monthly, max_points=MAX_TREND_POINTS):
+    if len(monthly) <= max_points:
+        return monthly, 1
+    size = -(-len(monthly) // max_points)
+    buckets = []
+    for start in range(0, len(monthly), size):
+        group = monthly[start:start + size]
+        buckets.append(repository.MonthlyTotal(group[0].month,
+                                               Money(round(sum(m.income for m in group) / len(group))),
+                                               Money(round(sum(m.expense for m in group) / len(group)))))
+    return buckets, size
+
+
+def render_pie(income, expense, size=PIE_SIZE):
+    fig = _figure(size)
+    ax = fig.add_subplot(111)
+    ax.set_title("Ienākumi un Izdevumi")
+    if income or expense:
+        ax.pie([income, expense], labels=['Ienākumi', 'Izdevumi'], autopct='%1.1f%%',
+               colors=[INCOME_COLOR, EXPENSE_COLOR])
+    else:
+        ax.text(0.5, 0.5, "Nav datu", ha='center', va='center')
+        ax.axis('off')
+    return _png(fig)
+
+
+def render_recent(monthly, size=RECENT_SIZE):
+    fig = _figure(size)
+    ax = fig.add_subplot(111)
+    ax.set_title("Pēdējo mēnešu izdevumi")
+    recent = monthly[-RECENT_MONTHS:][::-1]
+    ax.bar([m.month for m in recent], [m.expense.euros for m in recent], color='#007bff')
+    ax.tick_params(axis='x', rotation=45)
+    fig.tight_layout()
+    return _png(fig)
+
+
+def render_trend(monthly, size=TREND_SIZE):
+    points, months_per_point = bucket_months(monthly)
+    fig = _figure(size)
+    ax = fig.add_subplot(111)
+    title = "Mēneša tendences"
+    if months_per_point > 1:
+        title += f" (vidēji pa {months_per_point} mēnešiem)"
+    ax.set_title(title)
+    months = [m.month for m in points]
+    income = [m.income.euros for m in points]
+    expenses = [m.expense.euros for m in points]
+    ax.plot(months, income, label='Ienākumi', color=INCOME_COLOR, marker='o')
+    ax.plot(months, expenses, label='Izdevumi', color=EXPENSE_COLOR, marker='o')
+    ax.fill_between(months, income, expenses, color='#ffc107', alpha=0.3)
+    if points:
+        ax.legend()
+    ax.tick_params(axis='x', rotation=45)
+    fig.tight_layout()
+    return _png(fig)
+
+
+def chart_dir():
+    import jobs
+
+    return os.path.join(jobs.report_dir(), "charts")
+
+
+# "pie-3-2025-03-600x400-" - faila nosaukums bez datu versijas
+def _file_prefix(chart, user_id, period, size):
+    return f"{chart}-{user_id}-{period or 'all'}-{size[0]}x{size[1]}-"
+
+
+def _read(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+# Jaunā versija tiek ierakstīta ar pagaidu nosaukumu un pārdēvēta; tās pašas diagrammas vecās versijas tiek dzēstas
+def _write(directory, prefix, file, png):
+    try:
+        os.makedirs(directory, exist_ok=True)
+        partial = os.path.join(directory, f".{file}.{os.getpid()}-{threading.get_ident()}.part")
+        with open(partial, "wb") as f:
+            f.write(png)
+        os.replace(partial, os.path.join(directory, file))
+        for old in os.listdir(directory):
+            if old.startswith(prefix) and old != file:
+                os.remove(os.path.join(directory, old))
+    except OSError:
+        pass
+
+
+def _cached(chart, user_id, period, size, render):
+    version = repository.data_version(user_id)
+    key = (chart, user_id, version, period, size)
+    png = chart_cache.get(key)
+    if png is not None:
+        return png
+    directory = chart_dir()
+    prefix = _file_prefix(chart, user_id, period, size)
+    file = f"{prefix}{version}.png"
+    png = _read(os.path.join(directory, file))
+    if png is None:
+        png = render()
+        _write(directory, prefix, file, png)
+    chart_cache.put(key, png)
+    return png
+
+
+# period - mēnesis "YYYY-MM" vai None visam periodam
+def pie_chart(user_id, period=None, size=PIE_SIZE):
+    def render():
+        totals = repository.month_totals(user_id, period) if period else repository.lifetime_totals(user_id)
+        return render_pie(totals.income, totals.expense, size)
+    return _cached("pie", user_id, period, size, render)
+
+
+def recent_chart(user_id, size=RECENT_SIZE):
+    return _cached("recent", user_id, None, size, lambda: render_recent(repository.monthly_totals(user_id), size))
+
+
+def trend_chart(user_id, size=TREND_SIZE):
+    return _cached("trend", user_id, None, size, lambda: render_trend(repository.monthly_totals(user_id), size))
+
+
+# Izmet visus kešotos attēlus (atmiņā un diskā)
+def clear_cache():
+    chart_cache.clear()
+    directory = chart_dir()
+    if os.path.isdir(directory):
+        for file in os.listdir(directory):
+            if file.endswith(".png"):
+                os.remove(os.path.join(directory, file))
+
+
+# Visas analīzes loga diagrammas; izsaucams fona pavedienā
+def analysis_charts(user_id, month):
+    return {
+        "pie": pie_chart(user_id, month),
+        "recent": recent_chart(user_id),
+        "trend": trend_chart(user_id),
+    }
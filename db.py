@@ -0,0 +1,121 @@
+# Datubāzes savienojumu pārvaldība (kopīga Flask API un BudgetApp)
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+DB_PATH = os.environ.get("BUDGET_DB", "budget.db")
+POOL_SIZE = int(os.environ.get("BUDGET_DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = 10
+
+# Noskaņoti PRAGMA iestatījumi katram jaunam savienojumam
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+class ConnectionPool:
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+        self._all = []
+        self._lock = threading.Lock()
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, uri=True)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    # Savienojuma paņemšana no pūla; ligzdoti izsaukumi tajā pašā pavedienā izmanto to pašu savienojumu
+    @contextmanager
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        wait_start = time.perf_counter()
+        acquired = self._slots.acquire(timeout=POOL_TIMEOUT)
+        metrics.POOL_WAIT.observe(time.perf_counter() - wait_start)
+        if not acquired:
+            raise sqlite3.OperationalError("Datubāzes savienojumu pūls ir pilns")
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open()
+            self._local.conn = conn
+            self._local.depth = 0
+            try:
+                yield conn
+            except BaseException:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            else:
+                if conn.in_transaction:
+                    conn.commit()
+            finally:
+                self._local.conn = None
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        with self._lock:
+            conns, self._all = self._all, []
+        for conn in conns:
+            conn.close()
+        self._idle = queue.LifoQueue()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def configure(path=None, pool_size=None):
+    global DB_PATH, POOL_SIZE, _pool
+    with _pool_lock:
+        if path is not None:
+            DB_PATH = path
+        if pool_size is not None:
+            POOL_SIZE = pool_size
+        if _pool is not None:
+            _pool.close_all()
+        _pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_PATH, POOL_SIZE)
+    return _pool
+
+
+def connection():
+    return get_pool().connection()
+
+
+def close_all():
+    configure()
@@ -0,0 +1,722 @@
+# GUI klase BudgetApp; smagās bibliotēkas (matplotlib, atskaites, imports) ielādē tikai pēc vajadzības
+import base64
+import shutil
+import sqlite3
+import tkinter as tk
+from tkinter import messagebox, ttk, filedialog
+from datetime import datetime
+import auth
+import jobs
+import repository
+from money import Money
+from tasks import TaskExecutor
+
+# Transakciju saraksta skata modelis: glabā tikai redzamo logu, ko ielādē no SQLite pa daļām fona pavedienā.
+# on_change tiek izsaukts Tk pavedienā, kad ielādēts rindu skaits vai jauns logs
+class TransactionListModel:
+    # Kārtošanas atslēgas katrai kolonnai; katrai atbilst indekss, tāpēc ORDER BY neprasa pilnu kārtošanu
+    SORT_KEYS = {
+        "Type": ("type", "date", "amount", "id"),
+        "Amount": ("amount", "id"),
+        "Description": ("description", "id"),
+        "Date": ("date", "id"),
+    }
+
+    def __init__(self, user_id, tasks, on_change, window_size=200):
+        self.user_id = user_id
+        self.tasks = tasks
+        self.on_change = on_change
+        self.window_size = window_size
+        self.total = 0
+        self.sort_column = "Date"
+        self.sort_desc = False
+        self.query = ""
+        self.relevance = False
+        self._window_start = 0
+        self._rows = []
+        # Palielinās ar katru kārtošanas vai meklēšanas maiņu; vecāku vaicājumu rezultāti tiek izmesti
+        self._version = 0
+        self._fetching = None
+
+    def _invalidate(self):
+        self._version += 1
+        self._window_start = 0
+        self._rows = []
+        if self._fetching is not None:
+            self._fetching[-1].cancel()
+            self._fetching = None
+
+    # Maina kārtošanu; atkārtots klikšķis uz tās pašas kolonnas apgriež virzienu
+    def set_sort(self, column):
+        if column == self.sort_column and not self.relevance:
+            self.sort_desc = not self.sort_desc
+        else:
+            self.sort_column = column
+            self.sort_desc = False
+        self.relevance = False
+        self._invalidate()
+
+    # Meklēšanas režīmā saraksts satur tikai atrastās rindas, sākumā sakārtotas pēc atbilstības
+    def set_query(self, query):
+        self.query = query if repository.search_match(query) else ""
+        self.relevance = bool(self.query)
+        self.refresh()
+
+    def _sort_key(self, row):
+        return tuple(getattr(row, key) for key in self.SORT_KEYS[self.sort_column])
+
+    def refresh(self):
+        self._invalidate()
+        version = self._version
+        if self.query:
+            count, args = repository.search_count, (self.user_id, self.query)
+        else:
+            count, args = repository.transaction_count, (self.user_id,)
+        self.tasks.submit(count, *args, on_done=lambda total: self._on_total(version, total))
+
+    def _on_total(self, version, total):
+        if version == self._version:
+            self.total = total
+            self.on_change()
+
+    # Loga vaicājums tiek sagatavots Tk pavedienā, lai fona pavediens neredzētu vēlākas kārtošanas izmaiņas
+    def _fetch(self, offset, count):
+        key = (self._version, offset, count)
+        if self._fetching is not None:
+            if self._fetching[:3] == key and not self._fetching[-1].cancelled:
+                return
+            self._fetching[-1].cancel()
+        if self.query:
+            order_keys = None if self.relevance else self.SORT_KEYS[self.sort_column]
+            fetch, args = repository.search_transactions, (self.user_id, self.query, count, offset,
+                                                           order_keys, self.sort_desc)
+        else:
+            fetch, args = repository.transaction_window, (self.user_id, self.SORT_KEYS[self.sort_column],
+                                                          self.sort_desc, count, offset)
+        task = self.tasks.submit(fetch, *args, silent=True,
+                                 on_done=lambda rows: self._on_rows(key, rows))
+        self._fetching = key + (task,)
+
+    def _on_rows(self, key, rows):
+        self._fetching = None
+        version, offset, count = key
+        if version != self._version:
+            return
+        self._window_start = offset
+        self._rows = rows
+        # Mazāk rindu nekā prasīts: saraksts beidzas šeit (rindas dzēstas pēc skaita nolasīšanas)
+        if len(rows) < count:
+            self.total = offset + len(rows)
+        self.on_change()
+
+    def _covers(self, offset, count):
+        window_end = self._window_start + len(self._rows)
+        return self._window_start <= offset and min(offset + count, self.total) <= window_end
+
+    # Atgriež rindas [offset, offset + count) no ielādētā loga; None, ja logs vēl tiek ielādēts
+    def rows(self, offset, count):
+        if not self._covers(offset, count):
+            self._fetch(max(0, offset - (self.window_size - count) // 2), max(self.window_size, count))
+            return None
+        index = offset - self._window_start
+        return self._rows[index:index + count]
+
+    # Jauna rinda tiek pievienota saraksta beigās bez pilnas pārlādes
+    def append(self, row):
+        if self.query:
+            self.refresh()
+            return False
+        at_end = self._window_start + len(self._rows) == self.total
+        if not self._rows:
+            sorts_last = True
+        elif self.sort_desc:
+            sorts_last = self._sort_key(row) <= self._sort_key(self._rows[-1])
+        else:
+            sorts_last = self._sort_key(row) >= self._sort_key(self._rows[-1])
+        self.total += 1
+        if at_end and sorts_last:
+            self._rows.append(row)
+            return True
+        # Arī fonā ielādētais logs vairs neatbilst
+        self._invalidate()
+        return False
+
+# Arī matplotlib tiek ielādēts fona pavedienā, pirmo reizi atverot analīzi
+def run_charts(user_id, month):
+    import charts
+    return charts.analysis_charts(user_id, month)
+
+# Kopsummas un mēneša limits vienā fona uzdevumā
+def load_summary(user_id, month):
+    return repository.lifetime_totals(user_id), repository.budget_limit(user_id, month)
+
+# Atskaišu darbu stāvoklis un gatavo failu ceļi: {job_id: (status vai None, fails vai None)}
+def report_statuses(user_id, job_ids):
+    result = {}
+    for job_id in job_ids:
+        job = jobs.status(job_id, user_id)
+        done = job is not None and job["status"] == "done"
+        result[job_id] = (job, jobs.artifact(job_id, user_id) if done else None)
+    return result
+
+def cancel_report_jobs(user_id, job_ids):
+    for job_id in job_ids:
+        jobs.cancel(job_id, user_id)
+
+TREE_ROW_HEIGHT = 30
+SEARCH_DEBOUNCE_MS = 300
+REPORT_POLL_MS = 250
+TREE_HEADINGS = {"Type": "Tips", "Amount": "Summa", "Description": "Apraksts", "Date": "Datums"}
+
+# GUI vai klase BudgetApp
+class BudgetApp:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Budžeta pārvaldības sistēma")
+        self.root.geometry("1000x800")
+        self.root.configure(bg='#f0f0f0')
+        self.style = ttk.Style()
+        self.style.theme_use('clam')
+        self.style.configure('TButton', font=('Arial', 12), padding=5)
+        self.style.configure('Treeview', rowheight=TREE_ROW_HEIGHT)
+        self.style.map('Treeview', background=[('selected', '#007bff')])
+        self.username_var = tk.StringVar()
+        self.password_var = tk.StringVar()
+        self.search_after_id = None
+        self.busy_count = 0
+        self.report_jobs = {}
+        self.report_progress = []
+        self.report_after_id = None
+        self.report_poll_task = None
+        self.tasks = TaskExecutor(root, error_handler=self.show_task_error)
+        self.tasks.on_busy = self.on_busy_change
+        self.create_login_widgets()
+    # Ekrāna inicializācija funckcija
+    def create_login_widgets(self):
+        for widget in self.root.winfo_children():
+            widget.destroy()
+        
+        login_frame = tk.Frame(self.root, bg='#f0f0f0')
+        login_frame.pack(expand=True, fill=tk.BOTH, padx=50, pady=50)
+        
+        tk.Label(login_frame, text="Budžeta apskats", font=('Arial', 24, 'bold'), 
+                bg='#f0f0f0', fg='#333').pack(pady=20)
+        
+        form_frame = tk.Frame(login_frame, bg='#f0f0f0')
+        form_frame.pack(pady=20)
+        
+        tk.Label(form_frame, text="Lietotājvārds", font=('Arial', 12), bg='#f0f0f0').grid(row=0, column=0, padx=10, pady=5)
+        tk.Entry(form_frame, textvariable=self.username_var, font=('Arial', 12), 
+                width=25).grid(row=0, column=1, padx=10, pady=5)
+        
+        tk.Label(form_frame, text="Pārole", font=('Arial', 12), bg='#f0f0f0').grid(row=1, column=0, padx=10, pady=5)
+        tk.Entry(form_frame, textvariable=self.password_var, show="*", 
+                font=('Arial', 12), width=25).grid(row=1, column=1, padx=10, pady=5)
+        
+        btn_frame = tk.Frame(login_frame, bg='#f0f0f0')
+        btn_frame.pack(pady=20)
+        
+        tk.Button(btn_frame, text="Reģistrācija", command=self.register, 
+                 font=('Arial', 12), bg='#007bff', fg='white', width=12).pack(side=tk.LEFT, padx=10)
+        tk.Button(btn_frame, text="Ienākt", command=self.login, 
+                 font=('Arial', 12), bg='#28a745', fg='white', width=12).pack(side=tk.LEFT, padx=10)
+
+        self.create_status_bar(login_frame)
+
+    # Ielādes indikators un atcelšanas poga fona uzdevumiem
+    def create_status_bar(self, parent):
+        status_frame = tk.Frame(parent, bg='#f0f0f0')
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        self.status_label = tk.Label(status_frame, text="", font=('Arial', 10), bg='#f0f0f0', fg='#6c757d')
+        self.status_label.pack(side=tk.LEFT, padx=5)
+        self.cancel_button = tk.Button(status_frame, text="Atcelt", command=self.cancel_background,
+                                       font=('Arial', 10), bg='#6c757d', fg='white')
+
+    def on_busy_change(self, count):
+        self.busy_count = count
+        self.root.config(cursor="watch" if count else "")
+        self.update_status_bar()
+
+    # Fona uzdevumu skaits un atskaišu darbu progress
+    def update_status_bar(self):
+        if not self.status_label.winfo_exists():
+            return
+        parts = []
+        if self.busy_count:
+            parts.append(f"Lūdzu uzgaidiet... ({self.busy_count})")
+        if self.report_progress:
+            parts.append("Atskaite: " + ", ".join(f"{progress:.0%}" for progress in self.report_progress))
+        self.status_label.config(text=" | ".join(parts))
+        if parts:
+            self.cancel_button.pack(side=tk.LEFT, padx=5)
+        else:
+            self.cancel_button.pack_forget()
+
+    def cancel_background(self):
+        self.tasks.cancel_all()
+        self.cancel_reports()
+
+    def show_task_error(self, error):
+        if isinstance(error, sqlite3.Error):
+            messagebox.showerror("Datubāzes kļūda", f"Tehniskā kļūda: {str(error)}")
+        else:
+            messagebox.showerror("Kritiskā kļūda", f"Negaidīta kļūda: {str(error)}")
+    # Lietotāju reģistrācija funkcija
+    def register(self):
+        username = self.username_var.get().strip()  
+        password = self.password_var.get().strip()
+        
+
+        if not username or not password:
+            messagebox.showerror("Kļūda", "Lietotājvārds un parole nedrīkst būt tukši!")
+            return
+            
+        if len(username) < 3:
+            messagebox.showerror("Kļūda", "Lietotājvārdam jābūt vismaz 3 simbolus garam!")
+            return
+            
+        if len(password) < 6:
+            messagebox.showerror("Kļūda", "Parolei jābūt vismaz 6 simbolus garai!")
+            return
+        # bcrypt jaukšana notiek procesu pūlā, ieraksts datubāzē - fona pavedienā
+        self.tasks.submit(auth.hash_password, password, auth.BCRYPT_ROUNDS, cpu=True,
+                          on_done=lambda hashed_password: self.tasks.submit(
+                              repository.create_user, username, hashed_password, on_done=self.on_registered))
+
+    def on_registered(self, created):
+        if created:
+            messagebox.showinfo("Veiksmīgi", "Reģistrācija veiksmīga!")
+        else:
+            messagebox.showerror("Kļūda", "Lietotājvārds jau eksistē!")
+    # Lietotāju pieslēgšana funkcijā
+    def login(self):
+        username = self.username_var.get().strip()
+        password = self.password_var.get().strip()
+
+        if not username or not password:
+            messagebox.showerror("Kļūda", "Lūdzu aizpildiet abus laukus!")
+            return
+
+        self.tasks.submit(repository.find_user, username,
+                          on_done=lambda user: self.check_login(user, password))
+
+    def check_login(self, user, password):
+        if not user:
+            messagebox.showerror("Kļūda", "Lietotājs neeksistē!")
+            return
+        self.tasks.submit(auth.check_password, password, user[1], cpu=True,
+                          on_done=lambda valid: self.on_login_checked(user, password, valid))
+
+    def on_login_checked(self, user, password, valid):
+        if valid:
+            self.user_id = user[0]
+            # Ja mainīts BCRYPT_ROUNDS, parole fonā tiek pārjaukta ar jauno izmaksu faktoru
+            if auth.needs_rehash(user[1]):
+                self.tasks.submit(auth.hash_password, password, auth.BCRYPT_ROUNDS, cpu=True,
+                                  on_done=lambda hashed_password: self.tasks.submit(
+                                      repository.update_password, user[0], hashed_password))
+            self.open_budget_window()
+        else:
+            messagebox.showerror("Kļūda", "Nepareiza parole!")
+    # Izveidota ekrāna atvēršanas funkcija
+    def open_budget_window(self):
+        for widget in self.root.winfo_children():
+            widget.destroy()
+        
+        main_frame = tk.Frame(self.root, bg='#f0f0f0')
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        
+        input_frame = tk.Frame(main_frame, bg='#f0f0f0')
+        input_frame.pack(fill=tk.X, pady=10)
+        
+        self.amount_var = tk.StringVar()
+        self.desc_var = tk.StringVar()
+        
+        tk.Label(input_frame, text="Summa(€) ", font=('Arial', 12), bg='#f0f0f0').grid(row=0, column=0, padx=5)
+        tk.Entry(input_frame, textvariable=self.amount_var, font=('Arial', 12), width=15).grid(row=0, column=1, padx=5)
+        
+        tk.Label(input_frame, text="Apraksts", font=('Arial', 12), bg='#f0f0f0').grid(row=0, column=2, padx=5)
+        tk.Entry(input_frame, textvariable=self.desc_var, font=('Arial', 12), width=30).grid(row=0, column=3, padx=5)
+        
+        btn_frame = tk.Frame(input_frame, bg='#f0f0f0')
+        btn_frame.grid(row=0, column=4, padx=10)
+        
+        tk.Button(btn_frame, text="Pievienot ienākumu", command=lambda: self.add_transaction("income"),
+                 bg='#28a745', fg='white', font=('Arial', 12)).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Pievienot izdevumu", command=lambda: self.add_transaction("expense"),
+                 bg='#dc3545', fg='white', font=('Arial', 12)).pack(side=tk.LEFT, padx=5)
+        
+        search_frame = tk.Frame(main_frame, bg='#f0f0f0')
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        self.search_var = tk.StringVar()
+        self.search_after_id = None
+        tk.Label(search_frame, text="Meklēt", font=('Arial', 12), bg='#f0f0f0').pack(side=tk.LEFT, padx=5)
+        tk.Entry(search_frame, textvariable=self.search_var, font=('Arial', 12), width=40).pack(side=tk.LEFT, padx=5)
+        self.search_var.trace_add("write", lambda *_: self.schedule_search())
+
+        tree_frame = tk.Frame(main_frame, bg='#f0f0f0')
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.transactions_tree = ttk.Treeview(tree_frame, columns=("Type", "Amount", "Description", "Date"), show="headings")
+        for col in TREE_HEADINGS:
+            self.transactions_tree.heading(col, command=lambda col=col: self.sort_transactions(col))
+        self.transactions_tree.column("Type", width=100, anchor=tk.CENTER)
+        self.transactions_tree.column("Amount", width=150, anchor=tk.CENTER)
+        self.transactions_tree.column("Description", width=300, anchor=tk.W)
+        self.transactions_tree.column("Date", width=150, anchor=tk.CENTER)
+        self.transactions_tree.tag_configure('income', background='#d4edda')
+        self.transactions_tree.tag_configure('expense', background='#f8d7da')
+        self.tree_scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.on_tree_scroll)
+        self.tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.transactions_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.transactions_tree.bind("<Configure>", self.on_tree_resize)
+        self.transactions_tree.bind("<MouseWheel>", lambda e: self.scroll_transactions(-1 if e.delta > 0 else 1, "units"))
+        self.transactions_tree.bind("<Button-4>", lambda e: self.scroll_transactions(-1, "units"))
+        self.transactions_tree.bind("<Button-5>", lambda e: self.scroll_transactions(1, "units"))
+        self.transactions_model = TransactionListModel(self.user_id, self.tasks, self.render_transactions)
+        self.update_tree_headings()
+        self.tree_offset = 0
+        self.tree_visible_rows = 15
+        
+    
+        limit_frame = tk.Frame(main_frame, bg='#f0f0f0')
+        limit_frame.pack(pady=10, fill=tk.X)
+        
+        self.budget_limit_var = tk.StringVar()
+        tk.Label(limit_frame, text="Menēša budžeta līmits:", 
+                font=('Arial', 12), bg='#f0f0f0').pack(side=tk.LEFT)
+        tk.Entry(limit_frame, textvariable=self.budget_limit_var, 
+                font=('Arial', 12), width=15).pack(side=tk.LEFT, padx=5)
+        tk.Button(limit_frame, text="Pievienot līmitu", command=self.set_budget_limit,
+                 font=('Arial', 12), bg='#007bff', fg='white').pack(side=tk.LEFT)
+        
+      
+        summary_frame = tk.Frame(main_frame, bg='#ffffff', bd=1, relief=tk.SOLID)
+        summary_frame.pack(fill=tk.X, pady=20, padx=10)
+        
+        tk.Label(summary_frame, text="Kopā ienākumi:", font=('Arial', 12), 
+                bg='#ffffff').grid(row=0, column=0, padx=10, pady=5, sticky=tk.W)
+        self.total_income_label = tk.Label(summary_frame, text="$0.00", font=('Arial', 12), bg='#ffffff')
+        self.total_income_label.grid(row=0, column=1, padx=10, pady=5, sticky=tk.W)
+        
+        tk.Label(summary_frame, text=" Kopā izdevumi:", font=('Arial', 12), 
+                bg='#ffffff').grid(row=1, column=0, padx=10, pady=5, sticky=tk.W)
+        self.total_expense_label = tk.Label(summary_frame, text="$0.00", font=('Arial', 12), bg='#ffffff')
+        self.total_expense_label.grid(row=1, column=1, padx=10, pady=5, sticky=tk.W)
+        
+        tk.Label(summary_frame, text="Balance:", font=('Arial', 12, 'bold'), 
+                bg='#ffffff').grid(row=2, column=0, padx=10, pady=5, sticky=tk.W)
+        self.balance_label = tk.Label(summary_frame, text="$0.00", font=('Arial', 12, 'bold'), bg='#ffffff')
+        self.balance_label.grid(row=2, column=1, padx=10, pady=5, sticky=tk.W)
+        
+        self.budget_limit_info = tk.Label(summary_frame, text="", font=('Arial', 12), bg='#ffffff')
+        self.budget_limit_info.grid(row=3, column=0, columnspan=2, padx=10, pady=5, sticky=tk.W)
+        
+
+        control_frame = tk.Frame(main_frame, bg='#f0f0f0')
+        control_frame.pack(pady=10)
+        
+        tk.Button(control_frame, text="Paskatīt budžetu analīze", command=self.show_analysis,
+                 font=('Arial', 12), bg='#17a2b8', fg='white').pack(side=tk.LEFT, padx=5)
+        tk.Button(control_frame, text="Importēt izrakstu", command=self.import_statement,
+                 font=('Arial', 12), bg='#007bff', fg='white').pack(side=tk.LEFT, padx=5)
+        tk.Button(control_frame, text="Eksportēt Excel", command=self.export_excel,
+                 font=('Arial', 12), bg='#28a745', fg='white').pack(side=tk.LEFT, padx=5)
+        tk.Button(control_frame, text="Eksportēt PDF", command=self.export_pdf,
+                 font=('Arial', 12), bg='#dc3545', fg='white').pack(side=tk.LEFT, padx=5)
+        tk.Button(control_frame, text="Iziet", command=self.logout, 
+                 font=('Arial', 12), bg='#6c757d', fg='white').pack(side=tk.LEFT, padx=5)
+
+        self.create_status_bar(main_frame)
+
+        self.total_income = self.total_expense = Money(0)
+        self.current_limit = None
+        self.load_transactions()
+        self.load_budget_limit()
+    # Pievienot iznākumus un izdevumus
+    def add_transaction(self, trans_type):
+        description = self.desc_var.get()
+        current_date = datetime.now().strftime("%Y-%m-%d")  # Pievienojam pašreizējo datumu
+    
+        try:
+            amount = Money.parse(self.amount_var.get())
+            row = repository.validate_transaction(trans_type, amount, description, current_date)
+        except ValueError:
+            messagebox.showerror("Error", "Please enter valid amount and description")
+            return
+
+        self.tasks.submit(repository.add_transaction, self.user_id, *row,
+                          on_done=lambda trans_id: self.on_transaction_added(repository.Transaction(trans_id, *row)))
+
+    def on_transaction_added(self, row):
+        self.amount_var.set("")
+        self.desc_var.set("")
+
+        # Atjaunojam tikai vienu rindu un kopsummas, nevis visu sarakstu
+        appended = self.transactions_model.append(row)
+        if row.type == 'income':
+            self.total_income += row.amount
+        else:
+            self.total_expense += row.amount
+        self.update_summary_labels()
+        if appended:
+            self.tree_offset = max(0, self.transactions_model.total - self.tree_visible_rows)
+        self.render_transactions()
+    
+    def load_transactions(self):
+        current_month = datetime.now().strftime("%Y-%m")
+        self.tasks.submit(load_summary, self.user_id, current_month, on_done=self.on_summary_loaded)
+        self.tree_offset = 0
+        self.transactions_model.refresh()
+
+    def on_summary_loaded(self, summary):
+        (self.total_income, self.total_expense), self.current_limit = summary
+        self.update_summary_labels()
+
+    def update_summary_labels(self):
+        balance = self.total_income - self.total_expense
+        self.total_income_label.config(text=f"${self.total_income}")
+        self.total_expense_label.config(text=f"${self.total_expense}")
+        self.balance_label.config(text=f"${balance}")
+        self.balance_label.config(fg='#28a745' if balance >= 0 else '#dc3545')
+        
+        if self.current_limit:
+            remaining = self.current_limit - self.total_expense
+            status = f"Mēnēša budžets: ${self.current_limit} | Status: ${remaining}"
+            color = '#28a745' if remaining >= 0 else '#dc3545'
+            self.budget_limit_info.config(text=status, fg=color)
+
+    # Treeview satur tikai redzamās rindas; pārējās tiek ielādētas ritinot (kamēr logs tiek ielādēts fonā,
+    # paliek redzamas iepriekšējās rindas, un modelis pēc ielādes izsauc šo metodi vēlreiz)
+    def render_transactions(self):
+        if not self.transactions_tree.winfo_exists():
+            return
+        total = self.transactions_model.total
+        self.tree_offset = max(0, min(self.tree_offset, total - self.tree_visible_rows))
+        rows = self.transactions_model.rows(self.tree_offset, self.tree_visible_rows)
+
+        if rows is not None:
+            self.transactions_tree.delete(*self.transactions_tree.get_children())
+            for row in rows:
+                values = (row.type, Money(row.amount), row.description, row.date)
+                self.transactions_tree.insert("", "end", iid=str(row.id), values=values, tags=(row.type,))
+
+        if total:
+            self.tree_scrollbar.set(self.tree_offset / total, min(1.0, (self.tree_offset + self.tree_visible_rows) / total))
+        else:
+            self.tree_scrollbar.set(0, 1)
+
+    def scroll_transactions(self, amount, what):
+        step = self.tree_visible_rows if what == "pages" else 1
+        self.tree_offset += int(amount) * step
+        self.render_transactions()
+
+    def on_tree_scroll(self, action, *args):
+        if action == "moveto":
+            self.tree_offset = int(float(args[0]) * self.transactions_model.total)
+            self.render_transactions()
+        elif action == "scroll":
+            self.scroll_transactions(args[0], args[1])
+
+    def on_tree_resize(self, event):
+        visible_rows = max(1, (event.height - TREE_ROW_HEIGHT) // TREE_ROW_HEIGHT)
+        if visible_rows != self.tree_visible_rows:
+            self.tree_visible_rows = visible_rows
+            self.render_transactions()
+    
+    # Kārtošana notiek datubāzē ar ORDER BY; tiek pārlādēts tikai redzamais logs
+    def sort_transactions(self, col):
+        self.transactions_model.set_sort(col)
+        self.update_tree_headings()
+        self.tree_offset = 0
+        self.render_transactions()
+
+    def update_tree_headings(self):
+        model = self.transactions_model
+        for col, label in TREE_HEADINGS.items():
+            if model.relevance:
+                self.transactions_tree.heading(col, text=label)
+                continue
+            arrow = '↑' if col == model.sort_column and model.sort_desc else '↓'
+            self.transactions_tree.heading(col, text=f"{label} {arrow}")
+
+    # Meklēšana sākas tikai tad, kad lietotājs uz brīdi pārtrauc rakstīt
+    def schedule_search(self):
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self.run_search)
+
+    def run_search(self):
+        self.search_after_id = None
+        self.transactions_model.set_query(self.search_var.get())
+        self.update_tree_headings()
+        self.tree_offset = 0
+        self.render_transactions()
+    #  radīt finanšu analīze funkcija
+    def show_analysis(self):
+        current_month = datetime.now().strftime("%Y-%m")
+        self.tasks.submit(run_charts, self.user_id, current_month, on_done=self.open_analysis_window,
+                          on_error=lambda e: messagebox.showerror("Error", f"Kļūda : {str(e)}"))
+
+    # Diagrammas jau ir uzzīmētas fona pavedienā; Tk pavediens tikai parāda gatavos attēlus
+    def open_analysis_window(self, charts):
+        analysis_win = tk.Toplevel(self.root)
+        analysis_win.title("Budžeta analīze")
+        analysis_win.geometry("1200x850")
+
+        tk.Label(analysis_win, text="Finanšu analīze", font=('Arial', 16)).grid(row=0, column=0, columnspan=2)
+        analysis_win.images = {name: tk.PhotoImage(data=base64.b64encode(png)) for name, png in charts.items()}
+        tk.Label(analysis_win, image=analysis_win.images["pie"]).grid(row=1, column=0)
+        tk.Label(analysis_win, image=analysis_win.images["recent"]).grid(row=1, column=1)
+        tk.Label(analysis_win, image=analysis_win.images["trend"]).grid(row=2, column=0, columnspan=2)
+    # Budžeta ierobežojumu noteikšana funkcija
+    def set_budget_limit(self):
+        try:
+            limit = Money.parse(self.budget_limit_var.get())
+        except ValueError:
+            limit = Money(0)
+        if limit <= 0:
+            messagebox.showerror("Error", "Kļūda: Lūdzu ievadiet derīgu budžeta limitu!")
+            return
+        
+        current_month = datetime.now().strftime("%Y-%m")
+        self.tasks.submit(repository.set_budget_limit, self.user_id, current_month, limit,
+                          on_done=lambda _: self.on_budget_limit_set(limit),
+                          on_error=lambda e: messagebox.showerror("Error", str(e)))
+
+    def on_budget_limit_set(self, limit):
+        messagebox.showinfo("Success", "Budžeta limits ir nomainīts!")
+        self.current_limit = limit
+        self.update_summary_labels()
+    # Budžeta ierobežojumu ielādēšana funkcija
+    def load_budget_limit(self):
+        current_month = datetime.now().strftime("%Y-%m")
+        self.tasks.submit(repository.budget_limit, self.user_id, current_month,
+                          on_done=lambda limit: self.budget_limit_var.set(str(limit or Money(0))))
+    # Bankas izraksta importēšana funkcija
+    def import_statement(self):
+        file_path = filedialog.askopenfilename(
+            filetypes=[("Bankas izraksti", "*.csv *.txt *.xlsx *.xlsm *.ofx *.qfx"), ("All files", "*.*")],
+            title="Izvēlēties bankas izrakstu"
+        )
+        if file_path:
+            import importer
+
+            self.tasks.submit(importer.import_file, file_path, self.user_id,
+                              on_done=self.on_statement_imported,
+                              on_error=lambda e: messagebox.showerror("Error", f"Importēšanas kļūda:\n{str(e)}"))
+
+    def on_statement_imported(self, stats):
+        messagebox.showinfo("Success", f"Importēts: {stats['inserted']}\n"
+                                       f"Dublikāti: {stats['duplicates']}\n"
+                                       f"Noraidīti: {stats['rejected']}")
+        self.load_transactions()
+    # Dati eksportēšana uz Excel funkcija
+    def export_excel(self):
+        if not self.transactions_model.total:
+            messagebox.showwarning("Brīdinājums", "Nav datu eksportēšanai!")
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
+            title="Saglabāt kā Excel failu"
+        )
+
+        if file_path:
+            self.start_report("xlsx", file_path, f"Dati eksportēti:\n{file_path}")
+
+    def show_export_error(self, error):
+        if isinstance(error, PermissionError):
+            messagebox.showerror("Error", "Nav piekļuves tiesību faila rakstīšanai!")
+        else:
+            messagebox.showerror("Error", f"Eksportēšanas kļūda:\n{str(error)}")
+    # Dati eksportēšana uz PDF funkcija
+    def export_pdf(self):
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        self.start_report("pdf", file_path, "PDF ir veiksmīgi ģenerēts!")
+
+    # Atskaite tiek veidota darbu rindā atsevišķā procesā; gatavais fails tiek nokopēts izvēlētajā vietā
+    def start_report(self, report_format, file_path, message):
+        self.tasks.submit(jobs.submit, self.user_id, report_format,
+                          on_done=lambda job_id: self.on_report_submitted(job_id, file_path, message),
+                          on_error=self.show_export_error)
+
+    def on_report_submitted(self, job_id, file_path, message):
+        if job_id is None:
+            messagebox.showwarning("Brīdinājums", "Jau tiek veidotas vairākas atskaites, lūdzu uzgaidiet!")
+            return
+        self.report_jobs[job_id] = (file_path, message)
+        if self.report_after_id is None and self.report_poll_task is None:
+            self.poll_reports()
+
+    # Darbu stāvoklis tiek nolasīts no datubāzes fona pavedienā (viena rinda pēc primārās atslēgas)
+    def poll_reports(self):
+        self.report_after_id = None
+        self.report_poll_task = self.tasks.submit(report_statuses, self.user_id, list(self.report_jobs),
+                                                  silent=True, on_done=self.on_report_statuses,
+                                                  on_error=self.on_report_poll_error)
+
+    def on_report_statuses(self, statuses):
+        self.report_poll_task = None
+        self.report_progress = []
+        finished = []
+        for job_id, (job, source) in statuses.items():
+            if job_id not in self.report_jobs:
+                # Atcelts, kamēr stāvoklis tika nolasīts
+                continue
+            if job is not None and job["status"] in jobs.ACTIVE:
+                self.report_progress.append(job["progress"])
+            else:
+                finished.append((job, source, self.report_jobs.pop(job_id)))
+        self.update_status_bar()
+        for job, source, (file_path, message) in finished:
+            if job is None or job["status"] == "cancelled":
+                continue
+            if job["status"] == "failed":
+                messagebox.showerror("Error", f"Eksportēšanas kļūda:\n{job['error']}")
+                continue
+            if source is None:
+                messagebox.showerror("Error", "Atskaites fails vairs nav pieejams!")
+                continue
+            self.tasks.submit(shutil.copyfile, source, file_path,
+                              on_done=lambda _, message=message: messagebox.showinfo("Success", message),
+                              on_error=self.show_export_error)
+        if self.report_jobs:
+            self.report_after_id = self.root.after(REPORT_POLL_MS, self.poll_reports)
+
+    # Datubāzes kļūdas gadījumā darbi vairs netiek sekoti, lai kļūdas logs neatkārtotos ik pēc REPORT_POLL_MS
+    def on_report_poll_error(self, error):
+        self.report_poll_task = None
+        self.report_jobs.clear()
+        self.report_progress = []
+        self.update_status_bar()
+        self.show_task_error(error)
+
+    def cancel_reports(self):
+        if self.report_after_id is not None:
+            self.root.after_cancel(self.report_after_id)
+            self.report_after_id = None
+        if self.report_poll_task is not None:
+            self.report_poll_task.cancel()
+            self.report_poll_task = None
+        if self.report_jobs:
+            self.tasks.submit(cancel_report_jobs, self.user_id, list(self.report_jobs))
+        self.report_jobs.clear()
+        self.report_progress = []
+        self.update_status_bar()
+
+    # Izeja funkcija
+    def logout(self):
+        self.tasks.cancel_all()
+        self.cancel_reports()
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+            self.search_after_id = None
+        self.user_id = None
+        self.create_login_widgets()
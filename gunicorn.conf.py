@@ -0,0 +1,54 @@
+# Gunicorn iestatījumi: python main.py serve --server gunicorn
+# vai tieši: gunicorn -c gunicorn.conf.py "api:create_app()"
+import multiprocessing
+import os
+
+bind = os.environ.get("BUDGET_BIND", "127.0.0.1:5000")
+workers = int(os.environ.get("BUDGET_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+# Katram procesam vairāki pavedieni; WAL režīmā lasītāji viens otru nebloķē
+worker_class = "gthread"
+threads = int(os.environ.get("BUDGET_THREADS", "4"))
+
+# Pēc SIGTERM darba procesi pabeidz iesāktos pieprasījumus (arī straumētos sarakstus)
+graceful_timeout = int(os.environ.get("BUDGET_GRACEFUL_TIMEOUT", "30"))
+timeout = 60
+keepalive = 5
+
+# Darba procesi tiek periodiski atjaunoti, lai atbrīvotu atmiņu
+max_requests = 10000
+max_requests_jitter = 1000
+
+
+# Darba procesu metrikas tiek saskaitītas kopīgā mapē (metrics.py); tā tiek iztīrīta katrā palaišanā
+def on_starting(server):
+    import db
+    import metrics
+
+    os.environ.setdefault("BUDGET_METRICS_DIR", metrics.directory_for(db.DB_PATH))
+    metrics.reset_directory(os.environ["BUDGET_METRICS_DIR"])
+
+
+# Savienojumu pūls netiek dalīts starp procesiem
+def post_fork(server, worker):
+    import db
+
+    db.close_all()
+
+
+# Vēl nesāktie atskaišu darbi tiek atzīmēti kā neizdevušies, lai klienti tos negaidītu bezgalīgi
+def worker_exit(server, worker):
+    import db
+    import jobs
+
+    import metrics
+
+    jobs.shutdown()
+    db.close_all()
+    metrics.flush()
+
+
+# Beigušās darba procesa metrikas tiek apvienotas, lai mapē neuzkrātos faili no atjaunotajiem procesiem
+def child_exit(server, worker):
+    import metrics
+
+    metrics.retire(worker.pid)
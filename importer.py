@@ -0,0 +1,194 @@
+# Bankas izrakstu imports (CSV, Excel, OFX) ar paketes ierakstiem un dublikātu izlaišanu
+import csv
+import hashlib
+import os
+import re
+from datetime import datetime, date
+from itertools import islice
+
+import repository
+from money import Money
+
+BATCH_SIZE = 5000
+
+DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y", "%m/%d/%Y", "%Y/%m/%d", "%Y%m%d", "%d-%m-%Y")
+
+# Kolonnu nosaukumi, ko atpazīstam izrakstu galvenēs (mazajiem burtiem)
+COLUMN_NAMES = {
+    "date": ("date", "datums", "booking date", "transaction date", "value date", "posted"),
+    "amount": ("amount", "summa", "sum", "value"),
+    "debit": ("debit", "debets", "withdrawal", "out"),
+    "credit": ("credit", "kredīts", "kredits", "deposit", "in"),
+    "description": ("description", "apraksts", "details", "memo", "payee", "name", "narrative"),
+    "type": ("type", "tips"),
+}
+
+
+class StatementError(Exception):
+    pass
+
+
+def parse_date(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, date):
+        return value.isoformat()
+    value = str(value).strip()[:10]
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(f"Nezināms datuma formāts: {value}")
+
+
+# Summa centos (Money); Excel šūnas jau ir skaitļi
+def parse_amount(value):
+    if isinstance(value, (int, float)):
+        return Money.parse(value)
+    text = re.sub(r"[^\d,.\-+]", "", str(value))
+    if "," in text and "." in text:
+        # 1.234,56 vai 1,234.56 - pēdējais atdalītājs ir decimālais
+        if text.rfind(",") > text.rfind("."):
+            text = text.replace(".", "").replace(",", ".")
+        else:
+            text = text.replace(",", "")
+    else:
+        text = text.replace(",", ".")
+    return Money.parse(text)
+
+
+# Pārveido vienu izraksta rindu uz (type, amount, description, date) vai izmet ValueError
+def normalize(record):
+    trans_date = parse_date(record["date"])
+
+    if record.get("amount") not in (None, ""):
+        amount = parse_amount(record["amount"])
+    else:
+        credit = parse_amount(record["credit"]) if record.get("credit") not in (None, "") else Money(0)
+        debit = parse_amount(record["debit"]) if record.get("debit") not in (None, "") else Money(0)
+        amount = credit - abs(debit)
+
+    trans_type = str(record.get("type") or "").strip().lower()
+    if trans_type not in ("income", "expense"):
+        trans_type = "income" if amount > 0 else "expense"
+    amount = abs(amount)
+
+    description = str(record.get("description") or "").strip()
+    if amount <= 0 or not description:
+        raise ValueError("Nederīga summa vai apraksts")
+    return trans_type, amount, description, trans_date
+
+
+def _map_header(header):
+    mapping = {}
+    for index, name in enumerate(header):
+        name = str(name or "").strip().lower()
+        for field, names in COLUMN_NAMES.items():
+            if name in names and field not in mapping:
+                mapping[field] = index
+    if "date" not in mapping or not ({"amount", "debit", "credit"} & mapping.keys()):
+        raise StatementError("Izrakstā nav atrastas datuma un summas kolonnas")
+    return mapping
+
+
+def _records(rows):
+    mapping = None
+    for row in rows:
+        if mapping is None:
+            mapping = _map_header(row)
+            continue
+        if not any(cell not in (None, "") for cell in row):
+            continue
+        yield {field: row[index] if index < len(row) else None for field, index in mapping.items()}
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        yield from _records(csv.reader(f, dialect))
+
+
+def read_excel(path):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from _records(workbook.active.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+# OFX failu lasām pa daļām un izvelkam <STMTTRN> blokus (der gan SGML, gan XML variantam)
+def read_ofx(path, chunk_size=64 * 1024):
+    block_re = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.S | re.I)
+    tag_re = re.compile(r"<(\w+)>([^<\r\n]*)")
+    buffer = ""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buffer += chunk
+            end = 0
+            for match in block_re.finditer(buffer):
+                tags = {name.upper(): value.strip() for name, value in tag_re.findall(match.group(1))}
+                yield {
+                    "date": tags.get("DTPOSTED", "")[:8],
+                    "amount": tags.get("TRNAMT"),
+                    "description": tags.get("NAME") or tags.get("MEMO"),
+                }
+                end = match.end()
+            buffer = buffer[end:]
+            start = buffer.upper().rfind("<STMTTRN>")
+            buffer = buffer[start:] if start != -1 else buffer[-len("<STMTTRN>"):]
+            if not chunk:
+                break
+
+
+READERS = {".csv": read_csv, ".txt": read_csv, ".xlsx": read_excel, ".xlsm": read_excel,
+           ".ofx": read_ofx, ".qfx": read_ofx}
+
+
+# Satura jaukšana dublikātu noteikšanai; vienādas rindas vienā failā atšķir ar kārtas numuru
+def content_hash(row, occurrence):
+    trans_type, amount, description, trans_date = row
+    # Tāds pats pieraksts kā eiro summām pirms pārejas uz centiem, lai atkārtots imports netiktu dublēts
+    key = f"{trans_date}|{trans_type}|{amount}|{description}|{occurrence}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def import_file(path, user_id, batch_size=BATCH_SIZE, progress=None):
+    reader = READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        raise StatementError("Neatbalstīts faila formāts")
+
+    stats = {"read": 0, "inserted": 0, "duplicates": 0, "rejected": 0}
+    occurrences = {}
+
+    def rows():
+        for record in reader(path):
+            stats["read"] += 1
+            try:
+                row = normalize(record)
+            except (ValueError, TypeError, KeyError):
+                stats["rejected"] += 1
+                continue
+            occurrence = occurrences.get(row, 0)
+            occurrences[row] = occurrence + 1
+            yield (user_id,) + row + (content_hash(row, occurrence),)
+
+    pending = rows()
+    while True:
+        batch = list(islice(pending, batch_size))
+        if not batch:
+            break
+        inserted = repository.insert_transactions(batch)
+        stats["inserted"] += inserted
+        stats["duplicates"] += len(batch) - inserted
+        if progress:
+            progress(stats)
+    return stats
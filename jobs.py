@@ -0,0 +1,196 @@
+# Atskaišu darbu rinda: Excel/PDF atskaites tiek veidotas atsevišķos procesos, stāvoklis un progress glabājas
+# datubāzē (kopīgi visiem API darba procesiem un GUI), gatavie faili - diska kešā ar ierobežotu izmēru
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import db
+import repository
+
+REPORT_DIR = os.environ.get("BUDGET_REPORT_DIR")
+REPORT_CACHE_BYTES = int(os.environ.get("BUDGET_REPORT_CACHE_MB", "256")) * 1024 * 1024
+# Vienlaicīgi veidoto atskaišu skaits katrā procesā (API darba procesā vai GUI)
+MAX_WORKERS = int(os.environ.get("BUDGET_REPORT_WORKERS", "2"))
+MAX_ACTIVE_PER_USER = 4
+# Cik bieži darba process ieraksta progresu un pārbauda, vai darbs nav atcelts
+PROGRESS_INTERVAL = 0.5
+JOB_RETENTION = 7 * 86400
+# Darbs, kas tik ilgi gaida rindā vai nav ziņojis progresu, tiek uzskatīts par pārtrauktu (tā process beidzies)
+QUEUED_TIMEOUT = 3600
+RUNNING_TIMEOUT = 600
+
+REPORT_FORMATS = {"xlsx": "write_excel", "pdf": "write_pdf"}
+ACTIVE = repository.ACTIVE_REPORT_STATUSES
+
+_executor = None
+_futures = {}
+_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def report_dir():
+    if REPORT_DIR:
+        return os.path.abspath(REPORT_DIR)
+    return os.path.splitext(os.path.abspath(db.DB_PATH))[0] + "-reports"
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _init_worker(db_path):
+    db.configure(path=db_path)
+
+
+# spawn, nevis fork: API un GUI procesos darbojas pavedieni, kuru slēdzenes un SQLite savienojumi
+# nedrīkst nonākt bērnu procesā
+def _pool():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=_init_worker, initargs=(os.path.abspath(db.DB_PATH),))
+        return _executor
+
+
+# Izpildās darba procesā; fails tiek rakstīts ar pagaidu nosaukumu un pārdēvēts tikai tad, kad tas ir pabeigts
+def _run(job_id, user_id, report_format):
+    if not repository.start_report_job(job_id):
+        return
+    import reports
+
+    file = f"{job_id}.{report_format}"
+    path = os.path.join(report_dir(), file)
+    partial = path + ".part"
+    last = time.monotonic()
+
+    def progress(rows):
+        nonlocal last
+        now = time.monotonic()
+        if now - last >= PROGRESS_INTERVAL:
+            last = now
+            if not repository.report_job_progress(job_id, rows):
+                raise JobCancelled()
+
+    try:
+        os.makedirs(report_dir(), exist_ok=True)
+        getattr(reports, REPORT_FORMATS[report_format])(user_id, partial, progress=progress)
+        os.replace(partial, path)
+    except JobCancelled:
+        _remove(partial)
+        return
+    except Exception as e:
+        _remove(partial)
+        repository.finish_report_job(job_id, "failed", error=str(e) or type(e).__name__)
+        return
+    if not repository.finish_report_job(job_id, "done", file, os.path.getsize(path)):
+        # Atcelts pēc pēdējās progresa pārbaudes
+        _remove(path)
+    for expired in repository.expire_report_jobs(REPORT_CACHE_BYTES, JOB_RETENTION):
+        _remove(os.path.join(report_dir(), expired))
+
+
+# Izpildās pūla pavedienā; ja darba process avarējis, pūls vairs nav lietojams un tiek izveidots no jauna
+def _done(job_id, future):
+    global _executor
+    with _lock:
+        executor = _futures.pop(job_id, (None, None))[1]
+    if future.cancelled() or future.exception() is None:
+        return
+    error = future.exception()
+    repository.cancel_report_jobs([job_id], status="failed", error=str(error) or type(error).__name__)
+    if isinstance(error, BrokenProcessPool):
+        with _lock:
+            if _executor is executor:
+                _executor = None
+
+
+# Iesniedz atskaiti; ja tiem pašiem datiem darbs jau ir rindā vai gatavs, atgriež to pašu id.
+# None, ja lietotājam jau ir MAX_ACTIVE_PER_USER nepabeigti darbi
+def submit(user_id, report_format):
+    if report_format not in REPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(REPORT_FORMATS)}")
+    created = repository.create_report_job(secrets.token_urlsafe(12), user_id, report_format,
+                                           repository.data_version(user_id), repository.transaction_count(user_id),
+                                           MAX_ACTIVE_PER_USER, QUEUED_TIMEOUT, RUNNING_TIMEOUT)
+    if created is None:
+        return None
+    job_id, new = created
+    if new:
+        executor = _pool()
+        future = executor.submit(_run, job_id, user_id, report_format)
+        with _lock:
+            _futures[job_id] = (future, executor)
+        future.add_done_callback(lambda future: _done(job_id, future))
+    return job_id
+
+
+# Darba stāvoklis API atbildei un GUI: progress ir apstrādāto rindu daļa (1.0 - gatavs)
+def status(job_id, user_id):
+    job = repository.report_job(job_id, user_id)
+    if job is None:
+        return None
+    timeout = QUEUED_TIMEOUT if job.status == "queued" else RUNNING_TIMEOUT
+    if job.status in ACTIVE and job.updated < time.time() - timeout:
+        repository.fail_stale_report_jobs(QUEUED_TIMEOUT, RUNNING_TIMEOUT)
+        job = repository.report_job(job_id, user_id)
+    if job.status == "done":
+        progress = 1.0
+    else:
+        progress = round(min(job.rows / job.total, 1.0), 3) if job.total else 0.0
+    return {"id": job.id, "format": job.format, "status": job.status, "progress": progress,
+            "rows": job.rows, "total": job.total, "error": job.error, "size": job.size,
+            "created": job.created, "finished": job.finished}
+
+
+# Gatavā faila ceļš (vai None); lietošana atjauno tā vietu izmešanas secībā
+def artifact(job_id, user_id):
+    job = repository.report_job(job_id, user_id)
+    if job is None or job.status != "done":
+        return None
+    path = os.path.join(report_dir(), job.file)
+    if not os.path.exists(path):
+        return None
+    repository.touch_report_job(job_id)
+    return path
+
+
+# Atceļ nepabeigtu darbu vai dzēš pabeigtu kopā ar tā failu; False, ja darba nav.
+# Procesā esošs darbs apstājas nākamajā progresa pārbaudē
+def cancel(job_id, user_id):
+    if repository.report_job(job_id, user_id) is None:
+        return False
+    with _lock:
+        future = _futures.get(job_id, (None, None))[0]
+    if future is not None:
+        future.cancel()
+    if repository.cancel_report_jobs([job_id]):
+        return True
+    file = repository.delete_report_job(job_id, user_id)
+    if file:
+        _remove(os.path.join(report_dir(), file))
+    return file is not False
+
+
+# Procesa beigās: vēl nesāktie šī procesa darbi tiek atzīmēti kā neizdevušies, iesāktie tiek pabeigti
+def shutdown():
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+        futures = [(job_id, future) for job_id, (future, _) in _futures.items()]
+    # cancel() uzreiz izsauc _done, tāpēc ārpus slēdzenes
+    pending = [job_id for job_id, future in futures if future.cancel()]
+    if pending:
+        repository.cancel_report_jobs(pending, status="failed", error="Interrupted", queued=True)
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,364 @@
+# Veiktspējas metrikas (HTTP pieprasījumi, SQL vaicājumi, savienojumu pūla gaidīšana) Prometheus teksta formātā
+import bisect
+import functools
+import inspect
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import uuid
+
+SLOW_QUERY_MS = float(os.environ.get("BUDGET_SLOW_QUERY_MS", "100"))
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Vairāku procesu režīms (gunicorn/uvicorn darba procesi): katrs process periodiski ieraksta savas vērtības
+# failā <pid>-<id>.json šajā mapē, un /metrics tās saskaita, lai nolasījums nebūtu atkarīgs no tā, kurš process to
+# saņēma. Beigušos procesu vērtības tiek apvienotas failā RETIRED_FILE, lai skaitītāji nesamazinātos
+FLUSH_INTERVAL = 1.0
+PROCESS_FILE = re.compile(r"^\d+-[0-9a-f]+\.json$")
+RETIRED_FILE = "retired.json"
+
+log = logging.getLogger("budget.sql")
+
+_registry = []
+_process_lock = threading.Lock()
+_pid = None
+_directory = None
+_file = None
+_dirty = False
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return "+Inf" if value == math.inf else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *label_values, amount=1):
+        _record()
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def _reset(self):
+        with self._lock:
+            self._values = {}
+
+    # JSON saraksts no šī procesa vai saskaitītajām vērtībām
+    def snapshot(self, values=None):
+        if values is None:
+            with self._lock:
+                values = dict(self._values)
+        return [[list(label_values), value] for label_values, value in values.items()]
+
+    def merge(self, values, rows):
+        for label_values, value in rows:
+            key = tuple(label_values)
+            values[key] = values.get(key, 0) + value
+
+    # values - citu procesu saskaitītās vērtības; noklusējumā šī procesa vērtības
+    def collect(self, values=None):
+        if values is None:
+            with self._lock:
+                values = dict(self._values)
+        values = sorted(values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in values:
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+# Histogramma glabā skaitu katrā intervālā; kumulatīvās vērtības tiek aprēķinātas tikai nolasot
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, *label_values):
+        _record()
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _reset(self):
+        with self._lock:
+            self._series = {}
+
+    def snapshot(self, series=None):
+        if series is None:
+            with self._lock:
+                series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        return [[list(key), counts, total, count] for key, (counts, total, count) in series.items()]
+
+    def merge(self, series, rows):
+        for label_values, counts, total, count in rows:
+            merged = series.setdefault(tuple(label_values), [[0] * (len(self.buckets) + 1), 0.0, 0])
+            if len(counts) != len(merged[0]):
+                continue
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+            merged[2] += count
+
+    def collect(self, series=None):
+        if series is None:
+            with self._lock:
+                series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        series = sorted((key, counts, total, count) for key, (counts, total, count) in series.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                labels = _labels(self.labels, label_values, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram("budget_http_request_duration_seconds",
+                            "HTTP pieprasījuma ilgums līdz pēdējam nosūtītajam baitam", ("method", "route"))
+REQUESTS = Counter("budget_http_requests_total", "HTTP pieprasījumi pēc statusa koda", ("method", "route", "status"))
+QUERY_LATENCY = Histogram("budget_db_query_duration_seconds", "Nosaukta datubāzes vaicājuma ilgums", ("query",))
+SLOW_QUERIES = Counter("budget_db_slow_queries_total", "Vaicājumi, kas ilgāki par BUDGET_SLOW_QUERY_MS", ("query",))
+POOL_WAIT = Histogram("budget_db_pool_wait_seconds", "Gaidīšana uz brīvu savienojumu pūlā")
+SERIALIZE = Histogram("budget_serialize_duration_seconds", "Atbildes JSON serializācijas ilgums", ("endpoint",))
+
+
+def record_query(name, seconds):
+    QUERY_LATENCY.observe(seconds, name)
+    if seconds * 1000 > SLOW_QUERY_MS:
+        SLOW_QUERIES.inc(name)
+        log.warning("Lēns vaicājums %s: %.1f ms", name, seconds * 1000)
+
+
+# Dekorators datu piekļuves funkcijām; ģeneratoriem tiek skaitīts tikai laiks pašā ģeneratorā, ne patērētājā
+def timed_query(fn):
+    name = fn.__name__
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def generator_wrapper(*args, **kwargs):
+            elapsed = 0.0
+            inner = fn(*args, **kwargs)
+            try:
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        item = next(inner)
+                    except StopIteration:
+                        return
+                    finally:
+                        elapsed += time.perf_counter() - start
+                    yield item
+            finally:
+                inner.close()
+                record_query(name, elapsed)
+        return generator_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            record_query(name, time.perf_counter() - start)
+    return wrapper
+
+
+# Pirmais ieraksts jaunā procesā: fork mantotās vecāka vērtības tiek izmestas (tās ir vecāka failā),
+# un tiek palaists pavediens, kas periodiski ieraksta šī procesa failu
+def _record():
+    global _dirty
+    if _pid != os.getpid():
+        _start_process()
+    _dirty = True
+
+
+def _start_process():
+    global _pid, _directory, _file
+    with _process_lock:
+        if _pid == os.getpid():
+            return
+        _directory = os.environ.get("BUDGET_METRICS_DIR") or None
+        _pid = os.getpid()
+        if _directory:
+            for metric in list(_registry):
+                metric._reset()
+            os.makedirs(_directory, exist_ok=True)
+            _file = f"{_pid}-{uuid.uuid4().hex[:8]}.json"
+            threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+
+
+def _flush_loop():
+    pid = os.getpid()
+    while _pid == pid:
+        time.sleep(FLUSH_INTERVAL)
+        if _dirty:
+            flush()
+
+
+def _write_json(path, data):
+    tmp = os.path.join(os.path.dirname(path), "." + os.path.basename(path) + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Ieraksta šī procesa vērtības (vairāku procesu režīmā; citādi nedara neko)
+def flush():
+    global _dirty
+    if _pid != os.getpid() or not _directory:
+        return
+    with _process_lock:
+        _dirty = False
+        _write_json(os.path.join(_directory, _file),
+                    {metric.name: metric.snapshot() for metric in list(_registry)})
+
+
+def _merge(values, data):
+    for metric in list(_registry):
+        rows = data.get(metric.name)
+        if rows:
+            metric.merge(values[metric.name], rows)
+
+
+# Visu procesu failu summa. Procesu faili tiek nolasīti pirms RETIRED_FILE, tāpēc vienlaicīga retire()
+# vērtības neieskaita ne divreiz, ne nevienu reizi
+def _collect_directory(directory):
+    files = []
+    for file in sorted(os.listdir(directory)):
+        if PROCESS_FILE.match(file):
+            data = _read_json(os.path.join(directory, file))
+            if data is not None:
+                files.append((file, data))
+    retired = _read_json(os.path.join(directory, RETIRED_FILE)) or {"files": [], "metrics": {}}
+    values = {metric.name: {} for metric in list(_registry)}
+    skip = set(retired["files"])
+    for file, data in files:
+        if file not in skip:
+            _merge(values, data)
+    _merge(values, retired["metrics"])
+    return values
+
+
+def render():
+    lines = []
+    if _pid != os.getpid():
+        _start_process()
+    if _directory:
+        flush()
+        values = _collect_directory(_directory)
+        for metric in list(_registry):
+            lines += metric.collect(values[metric.name])
+    else:
+        for metric in list(_registry):
+            lines += metric.collect()
+    return "\n".join(lines) + "\n"
+
+
+# Servera galvenajam procesam: beidzies darba process pid tiek pievienots RETIRED_FILE (procesu failu skaits
+# neaug ar katru darba procesa atjaunošanu). Izsauc tikai viens process, tāpēc bloķēšana nav vajadzīga
+def retire(pid, directory=None):
+    directory = directory or os.environ.get("BUDGET_METRICS_DIR")
+    if not directory or not os.path.isdir(directory):
+        return
+    files = [file for file in os.listdir(directory) if PROCESS_FILE.match(file) and file.startswith(f"{pid}-")]
+    if not files:
+        return
+    path = os.path.join(directory, RETIRED_FILE)
+    retired = _read_json(path) or {"files": [], "metrics": {}}
+    # Iepriekš apvienoto failu nosaukumi vajadzīgi tikai, kamēr tie vēl nav izdzēsti
+    retired["files"] = [file for file in retired["files"] if os.path.exists(os.path.join(directory, file))]
+    values = {metric.name: {} for metric in list(_registry)}
+    _merge(values, retired["metrics"])
+    for file in files:
+        if file not in retired["files"]:
+            _merge(values, _read_json(os.path.join(directory, file)) or {})
+            retired["files"].append(file)
+    retired["metrics"] = {metric.name: metric.snapshot(values[metric.name]) for metric in list(_registry)}
+    _write_json(path, retired)
+    for file in files:
+        try:
+            os.remove(os.path.join(directory, file))
+        except FileNotFoundError:
+            pass
+
+
+# Noklusētā mape blakus datubāzei: budget.db -> budget-metrics
+def directory_for(db_path):
+    return os.path.splitext(os.path.abspath(db_path))[0] + "-metrics"
+
+
+# Servera palaišanai: iepriekšējās palaišanas failus izdzēš, lai metrikas sāktos no nulles
+def reset_directory(directory):
+    os.makedirs(directory, exist_ok=True)
+    for file in os.listdir(directory):
+        if PROCESS_FILE.match(file) or file == RETIRED_FILE:
+            os.remove(os.path.join(directory, file))
+
+
+# Flask starpslānis: maršruta latentums un statusi, kā arī /metrics galapunkts
+def init_app(app):
+    from flask import Response, g, request
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return response
+        # Maršruta šablons, nevis URL, lai metriku skaits nepieaugtu ar katru parametru
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        method = request.method
+        status = response.status_code
+
+        def finished():
+            REQUEST_LATENCY.observe(time.perf_counter() - start, method, route)
+            REQUESTS.inc(method, route, str(status))
+        response.call_on_close(finished)
+        return response
+
+    app.add_url_rule("/metrics", "metrics",
+                     lambda: Response(render(), mimetype="text/plain; version=0.0.4; charset=utf-8"))
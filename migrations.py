@@ -0,0 +1,435 @@
+# Datubāzes shēmas versiju migrācijas (PRAGMA user_version)
+import secrets
+import time
+
+import archive
+import db
+
+CHANGE_RETENTION_DAYS = 30
+
+
+def _columns(c, table):
+    c.execute(f"PRAGMA table_info({table})")
+    return [column[1] for column in c.fetchall()]
+
+
+# 1. versija: sākotnējā shēma (ieskaitot vecās datubāzes bez 'date' kolonnas)
+def _base_schema(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password TEXT NOT NULL CHECK(length(password) >= 60))''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS transactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                type TEXT,
+                amount REAL,
+                description TEXT,
+                date TEXT NOT NULL DEFAULT (DATE('now')),
+                FOREIGN KEY (user_id) REFERENCES users(id))''')
+
+    if 'date' not in _columns(c, "transactions"):
+        c.execute('''CREATE TABLE new_transactions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    type TEXT,
+                    amount REAL,
+                    description TEXT,
+                    date TEXT NOT NULL DEFAULT (DATE('now')),
+                    FOREIGN KEY (user_id) REFERENCES users(id))''')
+        c.execute('''INSERT INTO new_transactions
+                    (id, user_id, type, amount, description, date)
+                    SELECT id, user_id, type, amount, description, DATE('now')
+                    FROM transactions''')
+        c.execute("DROP TABLE transactions")
+        c.execute("ALTER TABLE new_transactions RENAME TO transactions")
+
+    c.execute('''CREATE TABLE IF NOT EXISTS budget_limits (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                month_year TEXT,
+                limit_amount REAL,
+                FOREIGN KEY (user_id) REFERENCES users(id))''')
+
+
+# 2. versija: indeksi datumu intervālu vaicājumiem un unikāls mēneša limits
+def _date_indexes(c):
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_transactions_user_date
+                ON transactions(user_id, date)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_transactions_user_type_date
+                ON transactions(user_id, type, date, amount)''')
+    # Atstājam tikai jaunāko limitu katram mēnesim, lai varētu izveidot unikālo indeksu
+    c.execute('''DELETE FROM budget_limits WHERE id NOT IN (
+                SELECT MAX(id) FROM budget_limits GROUP BY user_id, month_year)''')
+    c.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_budget_limits_user_month
+                ON budget_limits(user_id, month_year)''')
+
+
+# Mēneša kopsummu pārrēķināšana no transakciju tabulas (esošām datubāzēm vai pēc labojumiem)
+# source - transakciju avots (tabula vai arhīvu apvienojums, skat. archive.source)
+def rebuild_monthly_totals(c, user_id=None, source="transactions"):
+    where, params = ("WHERE user_id = ?", (user_id,)) if user_id is not None else ("", ())
+    c.execute(f"DELETE FROM monthly_totals {where}", params)
+    c.execute(f'''INSERT INTO monthly_totals (user_id, month, income, expense, count)
+                SELECT user_id, substr(date, 1, 7),
+                SUM(CASE WHEN type='income' THEN amount ELSE 0 END),
+                SUM(CASE WHEN type='expense' THEN amount ELSE 0 END),
+                COUNT(*)
+                FROM {source} {where}
+                GROUP BY user_id, substr(date, 1, 7)''', params)
+
+
+# 3. versija: mēneša kopsummu tabula, ko uztur trigeri tajā pašā transakcijā
+def _monthly_totals(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS monthly_totals (
+                user_id INTEGER NOT NULL,
+                month TEXT NOT NULL,
+                income REAL NOT NULL DEFAULT 0,
+                expense REAL NOT NULL DEFAULT 0,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, month)) WITHOUT ROWID''')
+
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_transactions_totals_insert
+                AFTER INSERT ON transactions BEGIN
+                    INSERT INTO monthly_totals (user_id, month, income, expense, count)
+                    VALUES (NEW.user_id, substr(NEW.date, 1, 7),
+                            CASE WHEN NEW.type='income' THEN NEW.amount ELSE 0 END,
+                            CASE WHEN NEW.type='expense' THEN NEW.amount ELSE 0 END, 1)
+                    ON CONFLICT (user_id, month) DO UPDATE SET
+                        income = income + excluded.income,
+                        expense = expense + excluded.expense,
+                        count = count + 1;
+                END''')
+
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_transactions_totals_delete
+                AFTER DELETE ON transactions BEGIN
+                    UPDATE monthly_totals SET
+                        income = income - CASE WHEN OLD.type='income' THEN OLD.amount ELSE 0 END,
+                        expense = expense - CASE WHEN OLD.type='expense' THEN OLD.amount ELSE 0 END,
+                        count = count - 1
+                    WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7);
+                    DELETE FROM monthly_totals
+                    WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7) AND count <= 0;
+                END''')
+
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_transactions_totals_update
+                AFTER UPDATE OF user_id, type, amount, date ON transactions BEGIN
+                    UPDATE monthly_totals SET
+                        income = income - CASE WHEN OLD.type='income' THEN OLD.amount ELSE 0 END,
+                        expense = expense - CASE WHEN OLD.type='expense' THEN OLD.amount ELSE 0 END,
+                        count = count - 1
+                    WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7);
+                    DELETE FROM monthly_totals
+                    WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7) AND count <= 0;
+                    INSERT INTO monthly_totals (user_id, month, income, expense, count)
+                    VALUES (NEW.user_id, substr(NEW.date, 1, 7),
+                            CASE WHEN NEW.type='income' THEN NEW.amount ELSE 0 END,
+                            CASE WHEN NEW.type='expense' THEN NEW.amount ELSE 0 END, 1)
+                    ON CONFLICT (user_id, month) DO UPDATE SET
+                        income = income + excluded.income,
+                        expense = expense + excluded.expense,
+                        count = count + 1;
+                END''')
+
+    rebuild_monthly_totals(c)
+
+
+# 4. versija: indeksi transakciju saraksta kārtošanai pēc summas un apraksta
+def _sort_indexes(c):
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_transactions_user_amount
+                ON transactions(user_id, amount)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_transactions_user_description
+                ON transactions(user_id, description)''')
+
+
+# 5. versija: importēto rindu satura jaukšana dublikātu izlaišanai
+def _import_hash(c):
+    if 'import_hash' not in _columns(c, "transactions"):
+        c.execute("ALTER TABLE transactions ADD COLUMN import_hash TEXT")
+    c.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_import_hash
+                ON transactions(user_id, import_hash) WHERE import_hash IS NOT NULL''')
+
+
+# 6. versija: lietotāja datu versijas skaitītājs ETag kešošanai; palielinās ar katru izmaiņu
+def _data_versions(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS data_versions (
+                user_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0)''')
+    for table in ("transactions", "budget_limits"):
+        for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            c.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+                        AFTER {event} ON {table} BEGIN
+                            INSERT INTO data_versions (user_id, version) VALUES ({row}.user_id, 1)
+                            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+                        END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_version_move
+                    AFTER UPDATE OF user_id ON {table} WHEN OLD.user_id IS NOT NEW.user_id BEGIN
+                        INSERT INTO data_versions (user_id, version) VALUES (OLD.user_id, 1)
+                        ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+                    END''')
+
+
+# 7. versija: FTS5 indekss aprakstu meklēšanai; saturs netiek dublēts, to sinhronizē trigeri
+def _description_search(c):
+    c.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+                description, content='transactions', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3')''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_insert
+                AFTER INSERT ON transactions BEGIN
+                    INSERT INTO transactions_fts (rowid, description) VALUES (NEW.id, NEW.description);
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_delete
+                AFTER DELETE ON transactions BEGIN
+                    INSERT INTO transactions_fts (transactions_fts, rowid, description)
+                    VALUES ('delete', OLD.id, OLD.description);
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_update
+                AFTER UPDATE OF description ON transactions BEGIN
+                    INSERT INTO transactions_fts (transactions_fts, rowid, description)
+                    VALUES ('delete', OLD.id, OLD.description);
+                    INSERT INTO transactions_fts (rowid, description) VALUES (NEW.id, NEW.description);
+                END''')
+    c.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')")
+
+
+# 8. versija: izmaiņu žurnāls sinhronizācijai; seq pieaug monotoni, dzēstās rindas paliek kā tombstone ieraksti
+def _change_log(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                entity TEXT NOT NULL,
+                entity_id INTEGER NOT NULL,
+                deleted INTEGER NOT NULL DEFAULT 0,
+                changed_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)))''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_change_log_user_seq ON change_log(user_id, seq)''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_change_log_entity
+                ON change_log(user_id, entity, entity_id, seq)''')
+    # Pēc tombstone dzēšanas klienti ar since zem robežas un vecāku epoch var būt palaiduši garām dzēšanu
+    c.execute('''CREATE TABLE IF NOT EXISTS change_log_horizons (
+                user_id INTEGER PRIMARY KEY,
+                tombstone_horizon INTEGER NOT NULL,
+                epoch INTEGER NOT NULL DEFAULT 1)''')
+
+    for table, entity in (("transactions", "transaction"), ("budget_limits", "budget_limit")):
+        for event, row, deleted in (("INSERT", "NEW", 0), ("UPDATE", "NEW", 0), ("DELETE", "OLD", 1)):
+            c.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_{event.lower()}
+                        AFTER {event} ON {table} BEGIN
+                            INSERT INTO change_log (user_id, entity, entity_id, deleted)
+                            VALUES ({row}.user_id, '{entity}', {row}.id, {deleted});
+                        END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_move
+                    AFTER UPDATE OF user_id ON {table} WHEN OLD.user_id IS NOT NEW.user_id BEGIN
+                        INSERT INTO change_log (user_id, entity, entity_id, deleted)
+                        VALUES (OLD.user_id, '{entity}', OLD.id, 1);
+                    END''')
+        # Esošās rindas žurnālā, lai sinhronizācija no since=0 atgrieztu pilnu stāvokli
+        c.execute(f'''INSERT INTO change_log (user_id, entity, entity_id)
+                    SELECT user_id, '{entity}', id FROM {table} WHERE user_id IS NOT NULL ORDER BY id''')
+
+
+# 9. versija: slēgto gadu arhīvu reģistrs; kamēr archive_moves nav tukša, rindu pārvietošana uz arhīvu
+# nemaina kopsummas, datu versiju un izmaiņu žurnālu (FTS indeksam rindas jāizņem vienmēr)
+def _archives(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS archives (
+                year INTEGER PRIMARY KEY,
+                file TEXT NOT NULL,
+                generation INTEGER NOT NULL,
+                rows INTEGER NOT NULL)''')
+    c.execute("CREATE TABLE IF NOT EXISTS archive_moves (active INTEGER NOT NULL)")
+    moving = "WHEN NOT EXISTS (SELECT 1 FROM archive_moves)"
+
+    c.execute("DROP TRIGGER IF EXISTS trg_transactions_totals_delete")
+    c.execute(f'''CREATE TRIGGER trg_transactions_totals_delete
+                AFTER DELETE ON transactions {moving} BEGIN
+                    UPDATE monthly_totals SET
+                        income = income - CASE WHEN OLD.type='income' THEN OLD.amount ELSE 0 END,
+                        expense = expense - CASE WHEN OLD.type='expense' THEN OLD.amount ELSE 0 END,
+                        count = count - 1
+                    WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7);
+                    DELETE FROM monthly_totals
+                    WHERE user_id = OLD.user_id AND month = substr(OLD.date, 1, 7) AND count <= 0;
+                END''')
+    c.execute("DROP TRIGGER IF EXISTS trg_transactions_version_delete")
+    c.execute(f'''CREATE TRIGGER trg_transactions_version_delete
+                AFTER DELETE ON transactions {moving} BEGIN
+                    INSERT INTO data_versions (user_id, version) VALUES (OLD.user_id, 1)
+                    ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+                END''')
+    c.execute("DROP TRIGGER IF EXISTS trg_transactions_changes_delete")
+    c.execute(f'''CREATE TRIGGER trg_transactions_changes_delete
+                AFTER DELETE ON transactions {moving} BEGIN
+                    INSERT INTO change_log (user_id, entity, entity_id, deleted)
+                    VALUES (OLD.user_id, 'transaction', OLD.id, 1);
+                END''')
+
+
+# 10. versija: API sesiju parakstīšanas atslēga (kopīga visiem darba procesiem) un atsauktie marķieri
+def _sessions(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS secrets (
+                name TEXT PRIMARY KEY,
+                value BLOB NOT NULL)''')
+    c.execute("INSERT OR IGNORE INTO secrets (name, value) VALUES ('session', ?)", (secrets.token_bytes(32),))
+    c.execute('''CREATE TABLE IF NOT EXISTS revoked_tokens (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                token_id TEXT NOT NULL UNIQUE,
+                expires INTEGER NOT NULL)''')
+
+
+# 11. versija: atskaišu darbu rinda, kopīga visiem API darba procesiem un GUI. Gatavie faili tiek
+# atkārtoti izmantoti tai pašai lietotāja datu versijai, accessed nosaka izmešanas secību,
+# updated ļauj pamanīt darbus, kuru process ir beidzies
+def _report_jobs(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS report_jobs (
+                id TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                format TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                rows INTEGER NOT NULL DEFAULT 0,
+                total INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                file TEXT,
+                size INTEGER,
+                created REAL NOT NULL,
+                updated REAL NOT NULL,
+                finished REAL,
+                accessed REAL)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_report_jobs_user ON report_jobs(user_id, format, version)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_report_jobs_status ON report_jobs(status, accessed)")
+
+
+# Tabulas pārbūve ar jaunām kolonnu definīcijām; tās indeksi, trigeri un AUTOINCREMENT skaitītājs
+# tiek saglabāti (dzēsto rindu id netiek izmantoti atkārtoti)
+def _rebuild_table(c, table, definition, columns, select, options=""):
+    c.execute('''SELECT sql FROM sqlite_master
+                WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL''', (table,))
+    schema = [row[0] for row in c.fetchall()]
+    c.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+    sequence = c.fetchone()
+    c.execute(f"CREATE TABLE new_{table} ({definition}) {options}")
+    c.execute(f"INSERT INTO new_{table} ({columns}) SELECT {select} FROM {table}")
+    c.execute(f"DROP TABLE {table}")
+    # Citu tabulu trigeri atsaucas uz tabulu pēc nosaukuma; jaunais pārdēvēšanas režīms tos pārbauda un
+    # nepieļauj, kamēr tabulas nav
+    c.execute("PRAGMA legacy_alter_table = ON")
+    try:
+        c.execute(f"ALTER TABLE new_{table} RENAME TO {table}")
+    finally:
+        c.execute("PRAGMA legacy_alter_table = OFF")
+    for sql in schema:
+        c.execute(sql)
+    if sequence:
+        c.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (sequence[0], table))
+
+
+# 12. versija: summas veselos centos (INTEGER) - precīzas kopsummas, mazākas rindas un indeksi.
+# Arhīviem tiek izveidota jauna formāta paaudze; mēnešu kopsummas tiek pārrēķinātas no jau noapaļotajām
+# rindām, lai tās sakristu ar rindu summām
+def _integer_cents(c):
+    def cents(column):
+        return f"CAST(ROUND({column} * 100) AS INTEGER)"
+
+    _rebuild_table(c, "monthly_totals", '''
+                user_id INTEGER NOT NULL,
+                month TEXT NOT NULL,
+                income INTEGER NOT NULL DEFAULT 0,
+                expense INTEGER NOT NULL DEFAULT 0,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, month)''',
+                   "user_id, month, income, expense, count",
+                   "user_id, month, income, expense, count", "WITHOUT ROWID")
+    _rebuild_table(c, "budget_limits", '''
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                month_year TEXT,
+                limit_amount INTEGER,
+                FOREIGN KEY (user_id) REFERENCES users(id)''',
+                   "id, user_id, month_year, limit_amount",
+                   f"id, user_id, month_year, {cents('limit_amount')}")
+    _rebuild_table(c, "transactions", '''
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                type TEXT,
+                amount INTEGER,
+                description TEXT,
+                date TEXT NOT NULL DEFAULT (DATE('now')),
+                import_hash TEXT,
+                FOREIGN KEY (user_id) REFERENCES users(id)''',
+                   "id, user_id, type, amount, description, date, import_hash",
+                   f"id, user_id, type, {cents('amount')}, description, date, import_hash")
+    rebuild_monthly_totals(c)
+    archive.upgrade(c)
+    c.executemany('''INSERT INTO monthly_totals (user_id, month, income, expense, count) VALUES (?, ?, ?, ?, ?)
+                  ON CONFLICT (user_id, month) DO UPDATE SET
+                      income = income + excluded.income,
+                      expense = expense + excluded.expense,
+                      count = count + excluded.count''', archive.monthly_totals(c))
+
+
+MIGRATIONS = [
+    _base_schema,
+    _date_indexes,
+    _monthly_totals,
+    _sort_indexes,
+    _import_hash,
+    _data_versions,
+    _description_search,
+    _change_log,
+    _archives,
+    _sessions,
+    _report_jobs,
+    _integer_cents,
+]
+
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+# Izpilda visas vēl nepiemērotās migrācijas, katru savā transakcijā
+def migrate():
+    with db.connection() as conn:
+        c = conn.cursor()
+        while True:
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                version = current_version(conn)
+                if version >= len(MIGRATIONS):
+                    conn.commit()
+                    return version
+                MIGRATIONS[version](c)
+                c.execute(f"PRAGMA user_version = {version + 1}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+
+# Kopsummās ietilpst arī arhivētās rindas
+def rebuild_totals(user_id=None):
+    with db.connection() as conn:
+        with archive.partitions(conn, begin="BEGIN IMMEDIATE") as schemas:
+            rebuild_monthly_totals(conn.cursor(), user_id, archive.source(schemas))
+
+
+# Žurnāla kompaktēšana: no katras rindas izmaiņām paliek tikai pēdējā, tombstone ieraksti vecāki
+# par retention_days tiek dzēsti; robeža un jauns epoch ļauj klientiem ar vecu kursoru saprast, ka jāsinhronizē no jauna
+def compact_changes(retention_days=CHANGE_RETENTION_DAYS):
+    with db.connection() as conn:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        c.execute('''DELETE FROM change_log WHERE seq NOT IN (
+                    SELECT MAX(seq) FROM change_log GROUP BY user_id, entity, entity_id)''')
+        superseded = c.rowcount
+        cutoff = int(time.time()) - retention_days * 86400
+        c.execute('''INSERT INTO change_log_horizons (user_id, tombstone_horizon)
+                    SELECT user_id, MAX(seq) FROM change_log WHERE deleted AND changed_at < ? GROUP BY user_id
+                    ON CONFLICT (user_id) DO UPDATE SET
+                        tombstone_horizon = MAX(tombstone_horizon, excluded.tombstone_horizon),
+                        epoch = epoch + 1''', (cutoff,))
+        c.execute('''DELETE FROM change_log WHERE deleted AND seq <= (
+                    SELECT tombstone_horizon FROM change_log_horizons h WHERE h.user_id = change_log.user_id)''')
+        tombstones = c.rowcount
+        conn.commit()
+        return superseded, tombstones
@@ -0,0 +1,82 @@
+# Naudas summas veselos centos: precīza saskaitīšana un salīdzināšana, SQLite tās glabā kā INTEGER.
+# Money ir int, tāpēc rindas un NumPy masīvi var saturēt tos pašus centus bez pārveidošanas
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+CENT = Decimal("0.01")
+# Lielākā summa centos: API eiro skaitļos (float) tā vēl ir precīza, un INTEGER kopsummās paliek vieta
+MAX_CENTS = 2 ** 53 - 1
+
+
+# Centi -> eiro skaitlis JSON atbildēm (tuvākais float, piemēram 1230 -> 12.3)
+def euros(cents):
+    return int(cents) / 100
+
+
+class Money(int):
+    __slots__ = ()
+
+    # Eiro summa no skaitļa vai teksta ("12.30", "12,30") uz centiem, noapaļojot līdz centam; izmet ValueError,
+    # arī summām, kas lielākas par MAX_CENTS
+    @classmethod
+    def parse(cls, value):
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, bool):
+            raise ValueError("amount must be a number")
+        if isinstance(value, float):
+            # repr dod īsāko decimālo pierakstu, tāpēc 0.29 nekļūst par 28.999... centiem
+            value = repr(value)
+        elif isinstance(value, str):
+            value = value.strip().replace(" ", "").replace(",", ".")
+        elif not isinstance(value, (int, Decimal)):
+            raise ValueError("amount must be a number")
+        try:
+            amount = Decimal(value)
+        except InvalidOperation:
+            raise ValueError("amount must be a number") from None
+        if not amount.is_finite():
+            raise ValueError("amount must be a finite number")
+        try:
+            # quantize izmet InvalidOperation, ja skaitlim ir vairāk ciparu nekā Decimal precizitātē
+            cents = int(amount.quantize(CENT, ROUND_HALF_UP).scaleb(2))
+        except InvalidOperation:
+            raise ValueError("amount is too large") from None
+        if abs(cents) > MAX_CENTS:
+            raise ValueError("amount is too large")
+        return cls(cents)
+
+    @property
+    def euros(self):
+        return euros(self)
+
+    def __str__(self):
+        whole, cents = divmod(abs(int(self)), 100)
+        return f"{'-' if self < 0 else ''}{whole}.{cents:02d}"
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+    # Formāta specifikācija attiecas uz eiro summu: f"{Money(1230):.2f}" -> "12.30"
+    def __format__(self, spec):
+        return format(self.euros, spec) if spec else str(self)
+
+    # Saskaitot un atņemot veselus skaitļus, rezultāts paliek Money (arī sum())
+    def __add__(self, other):
+        result = int.__add__(self, other)
+        return Money(result) if isinstance(other, int) else result
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        result = int.__sub__(self, other)
+        return Money(result) if isinstance(other, int) else result
+
+    def __rsub__(self, other):
+        result = int.__rsub__(self, other)
+        return Money(result) if isinstance(other, int) else result
+
+    def __neg__(self):
+        return Money(-int(self))
+
+    def __abs__(self):
+        return Money(abs(int(self)))
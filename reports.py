@@ -0,0 +1,202 @@
+# Atskaišu eksportēšana (Excel, PDF) lieliem vēsturiskajiem datiem
+import os
+from io import BytesIO
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont, TTFError
+from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+import archive
+import charts
+import db
+import repository
+from money import Money
+
+CHUNK_SIZE = 5000
+WIDTH_SAMPLE_ROWS = 1000
+MAX_COLUMN_WIDTH = 60
+
+TRANSACTION_HEADER = ["date", "type", "amount", "description"]
+TYPE_SHEETS = {"income": "Ienākumi", "expense": "Izdevumi"}
+
+
+def _format_chunk(df):
+    df["amount"] = np.char.mod("€%.2f", df["amount"].to_numpy(dtype=np.int64) / 100)
+    return df
+
+
+# Kolonnu platumu novērtē pēc pirmās daļas parauga, nevis pārstaigājot visas šūnas
+def _estimate_widths(header, sample):
+    widths = []
+    for name in header:
+        longest = sample[name].astype(str).str.len().max() if len(sample) else 0
+        widths.append(min(MAX_COLUMN_WIDTH, max(len(name), int(longest or 0)) + 2))
+    return widths
+
+
+def _set_widths(worksheet, widths):
+    for index, width in enumerate(widths, start=1):
+        worksheet.column_dimensions[get_column_letter(index)].width = width
+
+
+def _append_rows(worksheet, df):
+    for row in df.itertuples(index=False, name=None):
+        worksheet.append(row)
+
+
+def _write_monthly_sheet(workbook, user_id):
+    worksheet = workbook.create_sheet("Mēneši")
+    _set_widths(worksheet, [10, 14, 14, 14])
+    worksheet.append(["month", "income", "expense", "balance"])
+    for month in repository.monthly_totals(user_id):
+        worksheet.append([month.month, month.income.euros, month.expense.euros, (month.income - month.expense).euros])
+
+
+# Straumē transakcijas pa daļām write-only darbgrāmatā, tāpēc atmiņas patēriņš nav atkarīgs no rindu skaita.
+# progress(rindas) tiek izsaukts pēc katras daļas; izņēmums no tā pārtrauc eksportu
+def write_excel(user_id, file_path, monthly_summary=True, per_type=True, chunk_size=CHUNK_SIZE, progress=None):
+    workbook = Workbook(write_only=True)
+    sheets = {"all": workbook.create_sheet("Transakcijas")}
+    if per_type:
+        for trans_type, title in TYPE_SHEETS.items():
+            sheets[trans_type] = workbook.create_sheet(title)
+
+    rows = 0
+    with db.connection() as conn, archive.partitions(conn) as schemas:
+        query = repository.report_transactions_query(schemas)
+        for df in pd.read_sql(query, conn, params=(user_id,), chunksize=chunk_size):
+            df = _format_chunk(df.drop(columns="id"))
+            if rows == 0:
+                widths = _estimate_widths(TRANSACTION_HEADER, df.head(WIDTH_SAMPLE_ROWS))
+                for worksheet in sheets.values():
+                    _set_widths(worksheet, widths)
+                    worksheet.append(TRANSACTION_HEADER)
+            _append_rows(sheets["all"], df)
+            if per_type:
+                for trans_type in TYPE_SHEETS:
+                    _append_rows(sheets[trans_type], df[df["type"] == trans_type])
+            rows += len(df)
+            if progress:
+                progress(rows)
+
+    if rows == 0:
+        for worksheet in sheets.values():
+            worksheet.append(TRANSACTION_HEADER)
+    if monthly_summary:
+        _write_monthly_sheet(workbook, user_id)
+
+    workbook.save(file_path)
+    return rows
+
+
+PDF_CHUNK_SIZE = 500
+
+_pdf_font = None
+
+
+# Fonts ar latviešu burtiem tiek reģistrēts tikai vienreiz procesā
+def pdf_font():
+    global _pdf_font
+    if _pdf_font is None:
+        candidates = (("Arial", "arial.ttf"),
+                      ("DejaVuSans", os.path.join(matplotlib.get_data_path(), "fonts", "ttf", "DejaVuSans.ttf")))
+        for name, path in candidates:
+            try:
+                pdfmetrics.registerFont(TTFont(name, path))
+                _pdf_font = name
+                break
+            except TTFError:
+                continue
+        else:
+            _pdf_font = "Helvetica"
+    return _pdf_font
+
+
+def _table_style(font):
+    return TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.grey),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('FONTNAME', (0,0), (-1,-1), font),
+        ('FONTSIZE', (0,0), (-1,0), 12),
+        ('BOTTOMPADDING', (0,0), (-1,0), 12),
+        ('BACKGROUND', (0,1), (-1,-1), colors.beige),
+        ('GRID', (0,0), (-1,-1), 1, colors.grey)
+    ])
+
+
+# Stāsta saraksts, kas nākamo transakciju tabulu ielādē tikai tad, kad iepriekšējā jau izkārtota
+class _LazyStory(list):
+    def __init__(self, flowables, pending):
+        super().__init__(flowables)
+        self._pending = pending
+
+    def __len__(self):
+        if not super().__len__():
+            flowable = next(self._pending, None)
+            if flowable is not None:
+                self.append(flowable)
+        return super().__len__()
+
+
+def _transaction_tables(cursor, header, style, col_widths, chunk_size, progress=None):
+    done = 0
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        data = [header] + [[str(row[0]), row[1], f"${Money(row[2])}", row[3]] for row in rows]
+        yield Table(data, colWidths=col_widths, style=style, repeatRows=1)
+        done += len(rows)
+        if progress:
+            progress(done)
+
+
+# Vairāklapu PDF: tabulas tiek sadalītas pa lapām, rindas tiek lasītas no datubāzes pa daļām
+def write_pdf(user_id, file_path, chunk_size=PDF_CHUNK_SIZE, progress=None):
+    font = pdf_font()
+    styles = getSampleStyleSheet()
+    title_style = styles["Title"].clone("BudgetTitle", fontName=font)
+    heading_style = styles["Heading2"].clone("BudgetHeading", fontName=font)
+    text_style = styles["Normal"].clone("BudgetText", fontName=font, fontSize=12, leading=16)
+    style = _table_style(font)
+
+    doc = SimpleDocTemplate(file_path, pagesize=letter, title="Budžeta pārskats")
+    total_income, total_expense = repository.lifetime_totals(user_id)
+
+    story = [Paragraph("Budžeta pārskats", title_style),
+             Paragraph("Finanšu analīze:", heading_style),
+             Paragraph(f"Ienākumu summa: ${total_income}", text_style),
+             Paragraph(f"Izdevumu summa: ${total_expense}", text_style),
+             Paragraph(f"Atlikums: ${total_income - total_expense}", text_style),
+             Spacer(1, 12)]
+    # Attēli no diagrammu diska keša (atskaite tiek veidota atsevišķā procesā): tendence ir tā pati, ko rāda
+    # analīzes logs; sektoru diagramma šeit ir par visu periodu, analīzes logā - par tekošo mēnesi
+    if total_income or total_expense:
+        pie_width, pie_height = charts.PIE_SIZE
+        story.append(Image(BytesIO(charts.pie_chart(user_id)), width=400, height=400 * pie_height / pie_width))
+        trend_width, trend_height = charts.TREND_SIZE
+        story.append(Image(BytesIO(charts.trend_chart(user_id)),
+                           width=doc.width, height=doc.width * trend_height / trend_width))
+
+    monthly = [["Mēnesis", "Ienākumi", "Izdevumi"]] + [
+        [month, f"${income}", f"${expense}"] for month, income, expense in repository.monthly_totals(user_id)]
+    story += [Paragraph("Mēnešu kopsavilkums", heading_style),
+              Table(monthly, style=style, repeatRows=1),
+              Paragraph("Transakcijas", heading_style)]
+
+    with db.connection() as conn, archive.partitions(conn) as schemas:
+        c = conn.cursor()
+        c.execute(repository.report_transactions_query(schemas), (user_id,))
+        header = ["Datums", "Tips", "Summa", "Apraksts"]
+        col_widths = [1.1 * inch, 0.9 * inch, 1.1 * inch, doc.width - 3.1 * inch]
+        doc.build(_LazyStory(story, _transaction_tables(c, header, style, col_widths, chunk_size, progress)))
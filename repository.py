@@ -0,0 +1,625 @@
+# Datu piekļuves slānis: visi vaicājumi vienuviet, tos izmanto gan Flask API, gan BudgetApp
+import json
+import re
+import sqlite3
+import time
+from datetime import datetime
+from typing import NamedTuple
+
+import archive
+import db
+import metrics
+from money import Money
+
+
+# Summas centos (int); kopsummas un limiti - Money
+class Transaction(NamedTuple):
+    id: int
+    type: str
+    amount: int
+    description: str
+    date: str
+
+
+class MonthlyTotal(NamedTuple):
+    month: str
+    income: Money
+    expense: Money
+
+
+class TransactionFilter(NamedTuple):
+    where: str
+    params: list
+    date_from: str
+    date_to: str
+
+
+class ReportJob(NamedTuple):
+    id: str
+    user_id: int
+    format: str
+    status: str
+    rows: int
+    total: int
+    error: str
+    file: str
+    size: int
+    created: float
+    updated: float
+    finished: float
+
+
+class Totals(NamedTuple):
+    income: Money
+    expense: Money
+
+    @property
+    def balance(self):
+        return self.income - self.expense
+
+
+# Lietotāji
+
+@metrics.timed_query
+def find_user(username):
+    with db.connection() as conn:
+        return conn.execute("SELECT id, password FROM users WHERE username = ?", (username,)).fetchone()
+
+
+@metrics.timed_query
+def create_user(username, password_hash):
+    with db.connection() as conn:
+        try:
+            conn.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password_hash))
+            conn.commit()
+            return True
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            return False
+
+
+@metrics.timed_query
+def update_password(user_id, password_hash):
+    with db.connection() as conn:
+        conn.execute("UPDATE users SET password = ? WHERE id = ?", (password_hash, user_id))
+        conn.commit()
+
+
+# Sesijas
+
+@metrics.timed_query
+def session_secret():
+    with db.connection() as conn:
+        return conn.execute("SELECT value FROM secrets WHERE name = 'session'").fetchone()[0]
+
+
+# Atsauktais marķieris glabājas līdz tā termiņa beigām; tad to vairs nepieņem arī bez atsaukuma
+@metrics.timed_query
+def revoke_token(token_id, expires):
+    with db.connection() as conn:
+        conn.execute("DELETE FROM revoked_tokens WHERE expires < CAST(strftime('%s', 'now') AS INTEGER)")
+        conn.execute("INSERT OR IGNORE INTO revoked_tokens (token_id, expires) VALUES (?, ?)", (token_id, expires))
+        conn.commit()
+
+
+# Atsaukumi pēc after_seq, kuru termiņš vēl nav beidzies: (seq, token_id, expires)
+@metrics.timed_query
+def revoked_tokens(after_seq, now):
+    with db.connection() as conn:
+        return conn.execute('''SELECT seq, token_id, expires FROM revoked_tokens
+                            WHERE seq > ? AND expires >= ? ORDER BY seq''', (after_seq, now)).fetchall()
+
+
+# Transakcijas
+
+# Vienādas pārbaudes GUI un API ievadei; amount - eiro skaitlis vai Money.
+# Atgriež (type, amount, description, date) ar summu centos vai izmet ValueError
+def validate_transaction(trans_type, amount, description, date):
+    if trans_type not in ("income", "expense"):
+        raise ValueError("type must be income or expense")
+    if isinstance(amount, bool) or not isinstance(amount, (int, float)):
+        raise ValueError("amount must be a positive number")
+    amount = Money.parse(amount)
+    if amount <= 0:
+        raise ValueError("amount must be a positive number")
+    description = description.strip() if isinstance(description, str) else ""
+    if not description:
+        raise ValueError("description is required")
+    try:
+        datetime.strptime(date, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        raise ValueError("date must be YYYY-MM-DD") from None
+    return trans_type, amount, description, date
+
+
+@metrics.timed_query
+def add_transaction(user_id, trans_type, amount, description, date):
+    with db.connection() as conn:
+        c = conn.cursor()
+        c.execute('''INSERT INTO transactions
+                (user_id, type, amount, description, date)
+                VALUES (?, ?, ?, ?, ?)''',
+                (user_id, trans_type, amount, description, date))
+        conn.commit()
+        return c.lastrowid
+
+
+# Rindas, kuru import_hash jau ir arhīvā; aktīvajā tabulā dublikātus izlaiž unikālais indekss
+def _archived_duplicates(conn, rows):
+    hashed = [row for row in rows if row[5] is not None]
+    if not hashed:
+        return set()
+    dates = [row[4] for row in hashed]
+    by_user = {}
+    for row in hashed:
+        by_user.setdefault(row[0], []).append(row[5])
+    duplicates = set()
+    with archive.partitions(conn, min(dates), max(dates)) as schemas:
+        for schema in schemas[1:]:
+            for user_id, hashes in by_user.items():
+                duplicates.update((user_id, import_hash) for import_hash, in conn.execute(
+                    f'''SELECT import_hash FROM {schema}.transactions
+                    WHERE user_id = ? AND import_hash IN (SELECT value FROM json_each(?))''',
+                    (user_id, json.dumps(hashes))))
+    return duplicates
+
+
+# Paketes ieraksts; rindas: (user_id, type, amount, description, date, import_hash). Atgriež ierakstīto skaitu
+@metrics.timed_query
+def insert_transactions(rows):
+    with db.connection() as conn:
+        duplicates = _archived_duplicates(conn, rows)
+        if duplicates:
+            rows = [row for row in rows if (row[0], row[5]) not in duplicates]
+        c = conn.cursor()
+        c.executemany('''INSERT OR IGNORE INTO transactions
+                      (user_id, type, amount, description, date, import_hash)
+                      VALUES (?, ?, ?, ?, ?, ?)''', rows)
+        inserted = c.rowcount
+        conn.commit()
+        return inserted
+
+
+@metrics.timed_query
+def transaction_count(user_id):
+    with db.connection() as conn:
+        row = conn.execute("SELECT COALESCE(SUM(count), 0) FROM monthly_totals WHERE user_id = ?",
+                           (user_id,)).fetchone()
+    return row[0]
+
+
+# Viens saraksta logs; order_keys - kolonnu saraksts ar id beigās, kam atbilst indekss (skat. migrācijas).
+# Vispirms tiek atrasti loga id tikai no indeksiem, pēc tam nolasītas pašas rindas
+@metrics.timed_query
+def transaction_window(user_id, order_keys, descending, limit, offset):
+    direction = " DESC" if descending else ""
+    order_by = ", ".join(key + direction for key in order_keys)
+    outer_order_by = ", ".join("t." + key + direction for key in order_keys)
+    with db.connection() as conn, archive.partitions(conn) as schemas:
+        c = conn.cursor()
+        if len(schemas) > 1:
+            # Apvienojumā kārtošanas kolonnām jābūt rezultātā, tāpēc rindas tiek nolasītas atsevišķi pēc id
+            source = archive.source(schemas)
+            c.execute(f'''SELECT {", ".join(order_keys)} FROM {source}
+                       WHERE user_id = ? ORDER BY {order_by} LIMIT ? OFFSET ?''', (user_id, limit, offset))
+            ids = [row[-1] for row in c.fetchall()]
+            c.execute(f'''SELECT id, type, amount, description, date FROM {source}
+                       WHERE id IN (SELECT value FROM json_each(?))''', (json.dumps(ids),))
+            rows = {row[0]: row for row in c.fetchall()}
+            return [Transaction(*rows[row_id]) for row_id in ids if row_id in rows]
+        else:
+            c.execute(f'''SELECT t.id, t.type, t.amount, t.description, t.date
+                       FROM transactions t JOIN (
+                           SELECT id FROM transactions WHERE user_id = ?
+                           ORDER BY {order_by} LIMIT ? OFFSET ?) w ON t.id = w.id
+                       ORDER BY {outer_order_by}''', (user_id, limit, offset))
+        return [Transaction(*row) for row in c.fetchall()]
+
+
+# WHERE daļa transakciju filtriem; visi nosacījumi izmanto idx_transactions_user_date.
+# date_from/date_to nosaka, kuri arhīvi vaicājumam vajadzīgi (kursors after arī ierobežo sākumu)
+def transaction_filter(user_id, after=None, date_from=None, date_to=None, trans_type=None):
+    where = ["user_id = ?"]
+    params = [user_id]
+    if after:
+        where.append("(date, id) > (?, ?)")
+        params += list(after)
+    if date_from:
+        where.append("date >= ?")
+        params.append(date_from)
+    if date_to:
+        where.append("date <= ?")
+        params.append(date_to)
+    if trans_type:
+        where.append("type = ?")
+        params.append(trans_type)
+    if after and (not date_from or after[0] > date_from):
+        date_from = after[0]
+    return TransactionFilter(" AND ".join(where), params, date_from, date_to)
+
+
+# Rindas (type, amount, description, date) pa daļām, sakārtotas pēc (date, id).
+# id ir rezultātā, lai SQLite varētu apvienot jau kārtotus arhīvu zarus bez pagaidu kārtošanas
+@metrics.timed_query
+def iter_transaction_chunks(filters, limit=None, chunk_size=500):
+    with db.connection() as conn, archive.partitions(conn, filters.date_from, filters.date_to) as schemas:
+        c = conn.cursor()
+        c.execute(f'''SELECT id, type, amount, description, date FROM {archive.source(schemas)}
+                   WHERE {filters.where} ORDER BY date, id LIMIT ?''',
+                  list(filters.params) + [limit if limit else -1])
+        while True:
+            rows = c.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [row[1:] for row in rows]
+
+
+# Nākamās lapas kursors (date, id) vai None, ja aiz šīs lapas rindu vairs nav
+@metrics.timed_query
+def next_transaction_cursor(filters, limit):
+    with db.connection() as conn, archive.partitions(conn, filters.date_from, filters.date_to) as schemas:
+        c = conn.cursor()
+        c.execute(f'''SELECT date, id FROM {archive.source(schemas)} WHERE {filters.where}
+                   ORDER BY date, id LIMIT 2 OFFSET ?''', list(filters.params) + [limit - 1])
+        rows = c.fetchall()
+    return rows[0] if len(rows) == 2 else None
+
+
+MAX_SEARCH_TERMS = 8
+
+
+# FTS5 vaicājums no lietotāja teksta: katrs vārds kā prefikss, FTS sintakse netiek interpretēta
+def search_match(text):
+    return " ".join(f'"{term}"*' for term in re.findall(r"\w+", text)[:MAX_SEARCH_TERMS])
+
+
+# Viens meklēšanas zars katrai shēmai (aktīvā tabula un arhīvi), katram savs FTS indekss.
+# CROSS JOIN liek SQLite vispirms izmantot FTS indeksu, nevis pārbaudīt MATCH katrai lietotāja rindai
+def _search_legs(schemas, columns, match, user_id):
+    legs = [f'''SELECT {columns} FROM {schema}.transactions_fts CROSS JOIN {schema}.transactions t
+            ON t.id = transactions_fts.rowid WHERE transactions_fts MATCH ? AND t.user_id = ?''' for schema in schemas]
+    return " UNION ALL ".join(legs), [match, user_id] * len(schemas)
+
+
+# Atbilstība (lielāka - labāka): bm25 ir atkarīgs no katra indeksa statistikas (IDF, vidējais garums),
+# tāpēc ar vairākiem indeksiem rezultāts tiek dalīts ar labāko rezultātu tajā pašā indeksā
+def _ranked_search_legs(schemas, match, user_id):
+    if len(schemas) == 1:
+        return _search_legs(schemas, "t.id, t.type, t.amount, t.description, t.date, -bm25(transactions_fts) AS rank",
+                            match, user_id)
+    legs = [f'''SELECT t.id AS id, t.type, t.amount, t.description, t.date AS date, m.score / m.best AS rank
+            FROM (SELECT id, score, MIN(score) OVER () AS best FROM (
+                SELECT rowid AS id, bm25(transactions_fts) AS score FROM {schema}.transactions_fts
+                WHERE transactions_fts MATCH ?)) m
+            CROSS JOIN {schema}.transactions t ON t.id = m.id WHERE t.user_id = ?''' for schema in schemas]
+    return " UNION ALL ".join(legs), [match, user_id] * len(schemas)
+
+
+@metrics.timed_query
+def search_count(user_id, query):
+    match = search_match(query)
+    if not match:
+        return 0
+    with db.connection() as conn, archive.partitions(conn) as schemas:
+        legs, params = _search_legs(schemas, "COUNT(*) AS n", match, user_id)
+        row = conn.execute(f"SELECT SUM(n) FROM ({legs})", params).fetchone()
+    return row[0]
+
+
+# Meklēšanas rezultātu lapa; bez order_keys sakārtoti pēc atbilstības (bm25), tad jaunākie vispirms
+@metrics.timed_query
+def search_transactions(user_id, query, limit, offset=0, order_keys=None, descending=False):
+    match = search_match(query)
+    if not match:
+        return []
+    with db.connection() as conn, archive.partitions(conn) as schemas:
+        if order_keys:
+            direction = " DESC" if descending else ""
+            order_by = ", ".join(key + direction for key in order_keys)
+            legs, params = _search_legs(schemas, "t.id, t.type, t.amount, t.description, t.date", match, user_id)
+        else:
+            order_by = "rank DESC, date DESC, id DESC"
+            legs, params = _ranked_search_legs(schemas, match, user_id)
+        c = conn.cursor()
+        c.execute(f"{legs} ORDER BY {order_by} LIMIT ? OFFSET ?", params + [limit, offset])
+        return [Transaction(*row[:5]) for row in c.fetchall()]
+
+
+# Analītikai: (id, date, is_income, amount) pa daļām, tikai rindas ar id > after_id
+@metrics.timed_query
+def iter_transaction_columns(user_id, after_id=0, chunk_size=100000):
+    with db.connection() as conn, archive.partitions(conn) as schemas:
+        c = conn.cursor()
+        c.execute(f'''SELECT id, substr(date, 1, 10), type = 'income', amount FROM {archive.source(schemas)}
+                   WHERE user_id = ? AND id > ?''', (user_id, after_id))
+        while True:
+            rows = c.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+
+# Atskaitēm: (date, type, amount, description, id) sakārtotas pēc (date, id); schemas - archive.partitions
+def report_transactions_query(schemas):
+    return f'''SELECT date, type, amount, description, id
+        FROM {archive.source(schemas)}
+        WHERE user_id = ?
+        ORDER BY date, id'''
+
+
+# Kopsummas un limiti
+
+@metrics.timed_query
+def monthly_totals(user_id):
+    with db.connection() as conn:
+        c = conn.cursor()
+        c.execute('''SELECT month, income, expense FROM monthly_totals
+                  WHERE user_id = ? ORDER BY month''', (user_id,))
+        return [MonthlyTotal(month, Money(income), Money(expense)) for month, income, expense in c.fetchall()]
+
+
+@metrics.timed_query
+def month_totals(user_id, month):
+    with db.connection() as conn:
+        row = conn.execute('''SELECT income, expense FROM monthly_totals
+                           WHERE user_id = ? AND month = ?''', (user_id, month)).fetchone()
+    return Totals(Money(row[0]), Money(row[1])) if row else Totals(Money(0), Money(0))
+
+
+@metrics.timed_query
+def lifetime_totals(user_id):
+    with db.connection() as conn:
+        row = conn.execute('''SELECT COALESCE(SUM(income), 0), COALESCE(SUM(expense), 0)
+                           FROM monthly_totals WHERE user_id = ?''', (user_id,)).fetchone()
+    return Totals(Money(row[0]), Money(row[1]))
+
+
+@metrics.timed_query
+def budget_limit(user_id, month):
+    with db.connection() as conn:
+        row = conn.execute('''SELECT limit_amount FROM budget_limits
+                           WHERE user_id = ? AND month_year = ?''', (user_id, month)).fetchone()
+    return Money(row[0]) if row else None
+
+
+@metrics.timed_query
+def set_budget_limit(user_id, month, limit):
+    with db.connection() as conn:
+        conn.execute('''INSERT INTO budget_limits
+                     (user_id, month_year, limit_amount)
+                     VALUES (?, ?, ?)
+                     ON CONFLICT(user_id, month_year)
+                     DO UPDATE SET limit_amount = excluded.limit_amount''',
+                     (user_id, month, limit))
+        conn.commit()
+
+
+# Izmaiņu žurnāls
+
+@metrics.timed_query
+def latest_change(user_id):
+    with db.connection() as conn:
+        row = conn.execute("SELECT MAX(seq) FROM change_log WHERE user_id = ?", (user_id,)).fetchone()
+    return row[0] or 0
+
+
+# Arhivētās rindas pēc id: {id: (type, amount, description, date)}
+def _archived_transactions(conn, user_id, ids):
+    if not ids:
+        return {}
+    with archive.partitions(conn) as schemas:
+        return {row[0]: row[1:] for schema in schemas[1:] for row in conn.execute(
+            f'''SELECT id, type, amount, description, date FROM {schema}.transactions
+            WHERE user_id = ? AND id IN (SELECT value FROM json_each(?))''', (user_id, json.dumps(ids)))}
+
+
+# Izmaiņas pēc since: vienai rindai lapā tikai pēdējais stāvoklis, dzēstajām - tikai id.
+# reset=True nozīmē, ka pēc klienta kursora kompaktēti tombstone ieraksti un jāsinhronizē no since=0;
+# klients, kas atgriež iepriekšējās atbildes epoch, netiek atiestatīts vienas sinhronizācijas vidū
+@metrics.timed_query
+def changes_since(user_id, since, limit, epoch=None):
+    result = {"since": since, "next": since, "epoch": 0, "more": False, "reset": False,
+              "transactions": [], "budget_limits": [], "deleted_transactions": [], "deleted_budget_limits": []}
+    with db.connection() as conn:
+        state = conn.execute("SELECT tombstone_horizon, epoch FROM change_log_horizons WHERE user_id = ?",
+                             (user_id,)).fetchone()
+        if state:
+            result["epoch"] = state[1]
+            if 0 < since < state[0] and epoch != state[1]:
+                result["reset"] = True
+                result["next"] = 0
+                return result
+        rows = conn.execute('''SELECT c.seq, c.entity, c.entity_id, c.deleted,
+                                t.type, t.amount, t.description, t.date, b.month_year, b.limit_amount
+                            FROM change_log c
+                            LEFT JOIN transactions t ON c.entity = 'transaction' AND NOT c.deleted
+                                AND t.id = c.entity_id AND t.user_id = c.user_id
+                            LEFT JOIN budget_limits b ON c.entity = 'budget_limit' AND NOT c.deleted
+                                AND b.id = c.entity_id AND b.user_id = c.user_id
+                            WHERE c.user_id = ? AND c.seq > ?
+                            ORDER BY c.seq LIMIT ?''', (user_id, since, limit + 1)).fetchall()
+
+        result["more"] = len(rows) > limit
+        rows = rows[:limit]
+        if rows:
+            result["next"] = rows[-1][0]
+        latest = {}
+        for row in rows:
+            latest.pop((row[1], row[2]), None)
+            latest[(row[1], row[2])] = row
+        archived = _archived_transactions(conn, user_id, [entity_id for (entity, entity_id), row in latest.items()
+                                                          if entity == "transaction" and not row[3] and row[4] is None])
+    for (entity, entity_id), row in latest.items():
+        if row[3]:
+            result["deleted_" + entity + "s"].append(entity_id)
+        elif entity == "transaction" and row[4] is not None:
+            result["transactions"].append([entity_id] + list(row[4:8]))
+        elif entity == "transaction" and entity_id in archived:
+            result["transactions"].append([entity_id] + list(archived[entity_id]))
+        elif entity == "budget_limit" and row[8] is not None:
+            result["budget_limits"].append([entity_id, row[8], row[9]])
+    return result
+
+
+# Lietotāja datu versija; trigeri to palielina ar katru transakciju vai limitu izmaiņu
+@metrics.timed_query
+def data_version(user_id):
+    with db.connection() as conn:
+        row = conn.execute("SELECT version FROM data_versions WHERE user_id = ?", (user_id,)).fetchone()
+    return row[0] if row else 0
+
+
+# Kopsavilkums analīzei un /api/summary: tekošā mēneša kopsummas, limits un mēnešu dati
+@metrics.timed_query
+def summary(user_id, month):
+    with db.connection():
+        limit = budget_limit(user_id, month)
+        totals = month_totals(user_id, month)
+        return {
+            "total_income": totals.income,
+            "total_expense": totals.expense,
+            "monthly_data": monthly_totals(user_id),
+            "budget_limit": limit or 0,
+        }
+
+
+# Atskaišu darbi
+
+REPORT_JOB_COLUMNS = "id, user_id, format, status, rows, total, error, file, size, created, updated, finished"
+ACTIVE_REPORT_STATUSES = ("queued", "running")
+
+
+# Darbi, kas pārāk ilgi gaida rindā vai nav ziņojuši progresu (to process beidzies), tiek atzīmēti kā neizdevušies
+def _fail_stale_report_jobs(conn, queued_timeout, running_timeout):
+    now = time.time()
+    return conn.execute('''UPDATE report_jobs SET status = 'failed', error = 'Interrupted', finished = ?
+                 WHERE (status = 'queued' AND updated < ?) OR (status = 'running' AND updated < ?)''',
+                 (now, now - queued_timeout, now - running_timeout)).rowcount
+
+
+@metrics.timed_query
+def fail_stale_report_jobs(queued_timeout, running_timeout):
+    with db.connection() as conn:
+        failed = _fail_stale_report_jobs(conn, queued_timeout, running_timeout)
+        conn.commit()
+    return failed
+
+
+# Jauns darbs vai jau esošs tiem pašiem datiem (rindā, procesā vai gatavs): atgriež (id, jauns).
+# None, ja lietotājam jau ir max_active nepabeigti darbi
+@metrics.timed_query
+def create_report_job(job_id, user_id, report_format, version, total, max_active, queued_timeout,
+                      running_timeout):
+    with db.connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        _fail_stale_report_jobs(conn, queued_timeout, running_timeout)
+        row = conn.execute('''SELECT id FROM report_jobs WHERE user_id = ? AND format = ? AND version = ?
+                           AND status IN ('queued', 'running', 'done') ORDER BY created DESC LIMIT 1''',
+                           (user_id, report_format, version)).fetchone()
+        if row:
+            conn.commit()
+            return row[0], False
+        active = conn.execute("SELECT COUNT(*) FROM report_jobs WHERE user_id = ? AND status IN ('queued', 'running')",
+                              (user_id,)).fetchone()[0]
+        if active >= max_active:
+            conn.commit()
+            return None
+        now = time.time()
+        conn.execute('''INSERT INTO report_jobs (id, user_id, format, version, total, created, updated, accessed)
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                     (job_id, user_id, report_format, version, total, now, now, now))
+        conn.commit()
+        return job_id, True
+
+
+@metrics.timed_query
+def report_job(job_id, user_id):
+    with db.connection() as conn:
+        row = conn.execute(f"SELECT {REPORT_JOB_COLUMNS} FROM report_jobs WHERE id = ? AND user_id = ?",
+                           (job_id, user_id)).fetchone()
+    return ReportJob(*row) if row else None
+
+
+# Darba procesa sākums; False, ja darbs pa to laiku atcelts
+@metrics.timed_query
+def start_report_job(job_id):
+    with db.connection() as conn:
+        updated = conn.execute('''UPDATE report_jobs SET status = 'running', updated = ?
+                               WHERE status = 'queued' AND id = ?''', (time.time(), job_id)).rowcount
+        conn.commit()
+    return updated > 0
+
+
+# Progresa ieraksts kalpo arī kā atcelšanas pārbaude: False, ja darbs vairs nav procesā
+@metrics.timed_query
+def report_job_progress(job_id, rows):
+    with db.connection() as conn:
+        updated = conn.execute("UPDATE report_jobs SET rows = ?, updated = ? WHERE id = ? AND status = 'running'",
+                               (rows, time.time(), job_id)).rowcount
+        conn.commit()
+    return updated > 0
+
+
+@metrics.timed_query
+def finish_report_job(job_id, status, file=None, size=None, error=None):
+    with db.connection() as conn:
+        now = time.time()
+        updated = conn.execute('''UPDATE report_jobs SET status = ?, file = ?, size = ?, error = ?,
+                                 rows = CASE WHEN ? = 'done' THEN total ELSE rows END, finished = ?, accessed = ?
+                               WHERE status = 'running' AND id = ?''',
+                               (status, file, size, error, status, now, now, job_id)).rowcount
+        conn.commit()
+    return updated > 0
+
+
+# Atceļ rindā esošos vai procesā esošos darbus (queued=True - tikai vēl nesāktos)
+@metrics.timed_query
+def cancel_report_jobs(job_ids, status="cancelled", error=None, queued=False):
+    statuses = ("queued",) if queued else ACTIVE_REPORT_STATUSES
+    with db.connection() as conn:
+        updated = conn.execute(f'''UPDATE report_jobs SET status = ?, error = ?, finished = ?
+                               WHERE id IN (SELECT value FROM json_each(?))
+                               AND status IN ({", ".join("?" * len(statuses))})''',
+                               (status, error, time.time(), json.dumps(list(job_ids))) + statuses).rowcount
+        conn.commit()
+    return updated
+
+
+# Dzēš pabeigtu darbu; atgriež tā faila nosaukumu (var būt None) vai False, ja darba nav vai tas vēl notiek
+@metrics.timed_query
+def delete_report_job(job_id, user_id):
+    with db.connection() as conn:
+        row = conn.execute('''DELETE FROM report_jobs WHERE id = ? AND user_id = ?
+                           AND status NOT IN ('queued', 'running') RETURNING file''', (job_id, user_id)).fetchone()
+        conn.commit()
+    return row[0] if row else False
+
+
+@metrics.timed_query
+def touch_report_job(job_id):
+    with db.connection() as conn:
+        conn.execute("UPDATE report_jobs SET accessed = ? WHERE id = ?", (time.time(), job_id))
+        conn.commit()
+
+
+# Gatavie faili, kas neietilpst max_bytes (vecākie pēc pēdējās lietošanas), tiek atzīmēti kā izmesti,
+# darbi vecāki par retention sekundēm - dzēsti. Atgriež failus, kas jāizdzēš no diska
+@metrics.timed_query
+def expire_report_jobs(max_bytes, retention):
+    with db.connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        kept = 0
+        expired = []
+        for job_id, file, size in conn.execute('''SELECT id, file, size FROM report_jobs
+                                                WHERE status = 'done' ORDER BY accessed DESC''').fetchall():
+            kept += size
+            if kept > max_bytes:
+                expired.append((job_id, file))
+        conn.executemany("UPDATE report_jobs SET status = 'expired', file = NULL WHERE id = ?",
+                         [(job_id,) for job_id, _ in expired])
+        files = [file for _, file in expired]
+        files += [file for file, in conn.execute('''DELETE FROM report_jobs WHERE created < ?
+                                                  AND status NOT IN ('queued', 'running') RETURNING file''',
+                                                  (time.time() - retention,)) if file]
+        conn.commit()
+    return files
@@ -0,0 +1,96 @@
+# API sesiju marķieri "<user_id>.<derīgs_līdz>.<id>.<HMAC-SHA256>": pārbaude notiek atmiņā bez datubāzes vaicājuma.
+# Atsauktie marķieri tiek glabāti datubāzē un atmiņas LRU kešā; citu procesu atsaukumi tiek nolasīti ne biežāk
+# kā reizi REVOCATION_REFRESH sekundēs
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+import repository
+
+SESSION_TTL = int(os.environ.get("BUDGET_SESSION_TTL", str(12 * 3600)))
+REVOKED_CACHE_SIZE = 10000
+REVOCATION_REFRESH = 1.0
+
+_key = None
+_revoked = OrderedDict()
+_revoked_seq = 0
+_refreshed_at = None
+_lock = threading.Lock()
+
+
+# Atslēga no BUDGET_SECRET_KEY vai datubāzes, lai visi darba procesi pārbaudītu vienādi
+def _secret():
+    global _key
+    if _key is None:
+        configured = os.environ.get("BUDGET_SECRET_KEY")
+        _key = configured.encode("utf-8") if configured else repository.session_secret()
+    return _key
+
+
+def _sign(payload):
+    digest = hmac.new(_secret(), payload.encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=")
+
+
+def issue_token(user_id, ttl=SESSION_TTL):
+    expires = int(time.time()) + ttl
+    payload = f"{user_id}.{expires}.{secrets.token_urlsafe(12)}"
+    return f"{payload}.{_sign(payload).decode('ascii')}", expires
+
+
+# Atgriež (user_id, derīgs_līdz, id) parakstītam marķierim vai None
+def _parse(token):
+    payload, _, signature = token.rpartition(".")
+    if payload.count(".") != 2 or not hmac.compare_digest(signature.encode("utf-8"), _sign(payload)):
+        return None
+    user_id, expires, token_id = payload.split(".")
+    return int(user_id), int(expires), token_id
+
+
+# Pēc atsaukuma LRU ieraksti tiek izmesti tikai tad, ja kešs pārpildīts; vispirms tie, kuru termiņš beidzies
+def _remember(token_id, expires):
+    with _lock:
+        _revoked[token_id] = expires
+        _revoked.move_to_end(token_id)
+        if len(_revoked) > REVOKED_CACHE_SIZE:
+            now = time.time()
+            for expired in [key for key, until in _revoked.items() if until < now]:
+                del _revoked[expired]
+            while len(_revoked) > REVOKED_CACHE_SIZE:
+                _revoked.popitem(last=False)
+
+
+def _refresh_revoked():
+    global _revoked_seq, _refreshed_at
+    now = time.monotonic()
+    if _refreshed_at is not None and now - _refreshed_at < REVOCATION_REFRESH:
+        return
+    _refreshed_at = now
+    for seq, token_id, expires in repository.revoked_tokens(_revoked_seq, int(time.time())):
+        _remember(token_id, expires)
+        _revoked_seq = max(_revoked_seq, seq)
+
+
+# Lietotāja ID derīgam, neatsauktam marķierim, citādi None
+def verify_token(token):
+    parsed = _parse(token)
+    if parsed is None or parsed[1] < time.time():
+        return None
+    _refresh_revoked()
+    if parsed[2] in _revoked:
+        return None
+    return parsed[0]
+
+
+def revoke_token(token):
+    parsed = _parse(token)
+    if parsed is None:
+        return False
+    repository.revoke_token(parsed[2], parsed[1])
+    _remember(parsed[2], parsed[1])
+    return True
@@ -0,0 +1,106 @@
+# Fona uzdevumu izpildītājs: darbs notiek pavedienos vai procesos, rezultāti atgriežas Tk pavedienā
+import multiprocessing
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+class Task:
+    def __init__(self, future, silent=False):
+        self.future = future
+        self.silent = silent
+        self._cancelled = threading.Event()
+
+    # Atceļ uzdevumu; ja tas jau izpildās, tā rezultāts vienkārši tiek ignorēts
+    def cancel(self):
+        self._cancelled.set()
+        self.future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+
+class TaskExecutor:
+    def __init__(self, root, max_threads=4, max_processes=2, poll_interval=50, error_handler=None):
+        self.root = root
+        self.max_processes = max_processes
+        self.poll_interval = poll_interval
+        self.error_handler = error_handler
+        self.on_busy = None
+        self._threads = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="budget-worker")
+        self._processes = None
+        self._results = queue.Queue()
+        self._active = set()
+        self._polling = False
+        self._busy_count = 0
+
+    # spawn, nevis fork: GUI procesā jau darbojas pavedieni (fona uzdevumi, API serveris) un atvērti SQLite
+    # savienojumi, kas nedrīkst nonākt bērnu procesā
+    def _process_pool(self):
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(max_workers=self.max_processes,
+                                                  mp_context=multiprocessing.get_context("spawn"))
+        return self._processes
+
+    # cpu=True izpilda funkciju procesu pūlā (funkcijai jābūt moduļa līmenī, lai to varētu nosūtīt).
+    # silent=True - periodiski un ritināšanas vaicājumi, kas neieslēdz ielādes indikatoru
+    def submit(self, fn, *args, on_done=None, on_error=None, cpu=False, silent=False):
+        pool = self._process_pool() if cpu else self._threads
+        task = Task(pool.submit(fn, *args), silent)
+        self._active.add(task)
+        task.future.add_done_callback(lambda future: self._results.put((task, on_done, on_error)))
+        self._notify_busy()
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+        return task
+
+    # Rezultātu apstrāde notiek tikai Tk galvenajā pavedienā. Apstrādātāja kļūda tiek nodota Tk kļūdu
+    # ziņošanai un neaptur pārējo rezultātu saņemšanu
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    task, on_done, on_error = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                self._active.discard(task)
+                if task.cancelled or task.future.cancelled():
+                    continue
+                try:
+                    error = task.future.exception()
+                    if error is not None:
+                        handler = on_error or self.error_handler
+                        if handler:
+                            handler(error)
+                    elif on_done:
+                        on_done(task.future.result())
+                except Exception:
+                    self.root.report_callback_exception(*sys.exc_info())
+            self._notify_busy()
+        finally:
+            if self._active or not self._results.empty():
+                self.root.after(self.poll_interval, self._poll)
+            else:
+                self._polling = False
+
+    # Atceltie uzdevumi vairs netiek skaitīti kā aktīvi, pat ja pavediens vēl nav beidzis darbu
+    def _notify_busy(self):
+        count = sum(1 for task in self._active if not task.cancelled and not task.silent)
+        if self.on_busy and count != self._busy_count:
+            self.on_busy(count)
+        self._busy_count = count
+
+    def cancel_all(self):
+        for task in list(self._active):
+            task.cancel()
+        self._notify_busy()
+
+    def shutdown(self):
+        self.on_busy = None
+        self.cancel_all()
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
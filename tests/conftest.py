@@ -0,0 +1,44 @@
+# Kopīgās testu iekārtas: katram testam sava datubāze pagaidu mapē (arhīvi un atskaites - blakus tai)
+import os
+import sys
+from collections import OrderedDict
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import archive  # noqa: E402
+import db  # noqa: E402
+import migrations  # noqa: E402
+import repository  # noqa: E402
+import sessions  # noqa: E402
+
+# bcrypt jaucēja garums (users.password CHECK prasa vismaz 60 simbolus)
+PASSWORD_HASH = "$2b$04$" + "x" * 53
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", None)
+    monkeypatch.delenv("BUDGET_SECRET_KEY", raising=False)
+    # Sesiju atslēga un atsaukumu kešs ir procesa līmenī
+    monkeypatch.setattr(sessions, "_key", None)
+    monkeypatch.setattr(sessions, "_revoked", OrderedDict())
+    monkeypatch.setattr(sessions, "_revoked_seq", 0)
+    monkeypatch.setattr(sessions, "_refreshed_at", None)
+    path = str(tmp_path / "budget.db")
+    db.configure(path=path)
+    yield path
+    db.close_all()
+
+
+@pytest.fixture
+def migrated(database):
+    migrations.migrate()
+    return database
+
+
+@pytest.fixture
+def user_id(migrated):
+    repository.create_user("tester", PASSWORD_HASH)
+    return repository.find_user("tester")[0]
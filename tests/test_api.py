@@ -0,0 +1,24 @@
+# API lietotnes izveide kopā ar citiem datubāzes lietotājiem tajā pašā procesā
+import threading
+
+import api
+import db
+
+
+# gui --api: API tiek izveidots, kamēr GUI fona pavediens tur savienojumu
+def test_create_app_keeps_connections_of_other_threads(migrated):
+    checked_out, release, result = threading.Event(), threading.Event(), []
+
+    def worker():
+        with db.connection() as conn:
+            checked_out.set()
+            release.wait(5)
+            result.append(conn.execute("SELECT COUNT(*) FROM users").fetchone()[0])
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    checked_out.wait(5)
+    api.create_app()
+    release.set()
+    thread.join(5)
+    assert result == [0]
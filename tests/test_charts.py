@@ -0,0 +1,61 @@
+# Diagrammu diska kešs: analīzes loga attēlus atkārtoti izmanto cits process (PDF atskaites darbs)
+import os
+
+import pytest
+
+pytest.importorskip("matplotlib")
+
+import charts  # noqa: E402
+import repository  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def empty_memory_cache(monkeypatch):
+    monkeypatch.setattr(charts, "chart_cache", charts.LRUCache())
+
+
+def _files():
+    return sorted(file for file in os.listdir(charts.chart_dir()) if file.endswith(".png"))
+
+
+def _fail(*args):
+    raise AssertionError("diagramma zīmēta no jauna")
+
+
+def test_chart_is_reused_from_disk_in_another_process(user_id, monkeypatch):
+    repository.add_transaction(user_id, "income", 150000, "alga", "2025-03-01")
+    png = charts.trend_chart(user_id)
+    assert _files() == [f"trend-{user_id}-all-1200x400-{repository.data_version(user_id)}.png"]
+
+    # Cits process: tukšs atmiņas kešs, attēls tiek nolasīts no diska
+    monkeypatch.setattr(charts, "chart_cache", charts.LRUCache())
+    monkeypatch.setattr(charts, "render_trend", _fail)
+    assert charts.trend_chart(user_id) == png
+
+
+def test_new_data_version_replaces_old_file(user_id, monkeypatch):
+    repository.add_transaction(user_id, "income", 150000, "alga", "2025-03-01")
+    charts.pie_chart(user_id)
+    charts.pie_chart(user_id, "2025-03")
+    repository.add_transaction(user_id, "expense", 2500, "kafija", "2025-03-02")
+    charts.pie_chart(user_id)
+    version = repository.data_version(user_id)
+    assert _files() == [f"pie-{user_id}-2025-03-600x400-{version - 1}.png",
+                        f"pie-{user_id}-all-600x400-{version}.png"]
+
+    charts.clear_cache()
+    assert _files() == []
+
+
+def test_pdf_report_uses_cached_charts(user_id, monkeypatch, tmp_path):
+    reports = pytest.importorskip("reports")
+    repository.add_transaction(user_id, "income", 150000, "alga", "2025-03-01")
+    repository.add_transaction(user_id, "expense", 2500, "kafija", "2025-03-02")
+    charts.trend_chart(user_id)
+    charts.pie_chart(user_id)
+
+    monkeypatch.setattr(charts, "chart_cache", charts.LRUCache())
+    monkeypatch.setattr(charts, "render_trend", _fail)
+    monkeypatch.setattr(charts, "render_pie", _fail)
+    reports.write_pdf(user_id, str(tmp_path / "atskaite.pdf"))
+    assert os.path.getsize(tmp_path / "atskaite.pdf") > 0
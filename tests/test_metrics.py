@@ -0,0 +1,69 @@
+# /metrics ar vairākiem darba procesiem: katrs process raksta savu failu, nolasījums saskaita visus
+import os
+import subprocess
+import sys
+
+import metrics
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = '''
+import os, metrics
+for _ in range({requests}):
+    metrics.REQUESTS.inc("GET", "/api/summary", "200")
+    metrics.REQUEST_LATENCY.observe(0.003, "GET", "/api/summary")
+metrics.flush()
+print(os.getpid())
+'''
+
+
+# Process, kas pats neizsauc flush(): vērtības ieraksta fona pavediens
+IDLE_WORKER = '''
+import time, metrics
+metrics.REQUESTS.inc("GET", "/api/summary", "200")
+time.sleep(metrics.FLUSH_INTERVAL * 2.5)
+'''
+
+
+def _run(code, directory):
+    env = dict(os.environ, BUDGET_METRICS_DIR=str(directory))
+    return subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, env=env, check=True,
+                          capture_output=True, text=True).stdout
+
+
+def _scrape(directory):
+    return _run("import metrics; print(metrics.render())", directory)
+
+
+def _value(text, line_start):
+    (line,) = [line for line in text.splitlines() if line.startswith(line_start)]
+    return float(line.rsplit(" ", 1)[1])
+
+
+def test_scrape_sums_all_worker_processes(tmp_path):
+    first = int(_run(WORKER.format(requests=3), tmp_path))
+    _run(WORKER.format(requests=2), tmp_path)
+
+    text = _scrape(tmp_path)
+    assert _value(text, 'budget_http_requests_total{method="GET",route="/api/summary",status="200"}') == 5
+    assert _value(text, 'budget_http_request_duration_seconds_count{method="GET",route="/api/summary"}') == 5
+    assert _value(text, 'budget_http_request_duration_seconds_bucket{method="GET",route="/api/summary",'
+                        'le="0.005"}') == 5
+
+    # Beidzies process: vērtības paliek, bet tā fails tiek apvienots
+    metrics.retire(first, str(tmp_path))
+    assert not [file for file in os.listdir(tmp_path) if file.startswith(f"{first}-")]
+    assert os.path.exists(tmp_path / metrics.RETIRED_FILE)
+    assert _scrape(tmp_path) == text
+
+    _run(WORKER.format(requests=1), tmp_path)
+    _run(IDLE_WORKER, tmp_path)
+    assert _value(_scrape(tmp_path), 'budget_http_requests_total{method="GET",route="/api/summary",status="200"}') == 7
+
+    metrics.reset_directory(str(tmp_path))
+    assert 'budget_http_requests_total{' not in _scrape(tmp_path)
+
+
+def test_single_process_without_directory():
+    metrics.REQUESTS.inc("GET", "/testa/marsruts", "204")
+    assert 'budget_http_requests_total{method="GET",route="/testa/marsruts",status="204"}' in metrics.render()
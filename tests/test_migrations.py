@@ -0,0 +1,98 @@
+# 12. migrācija: REAL summas (arī arhīvos) tiek pārvērstas veselos centos un mēnešu kopsummas sakrīt ar rindām
+import os
+import sqlite3
+import stat
+
+import pytest
+
+import analytics
+import archive
+import db
+import migrations
+import repository
+from conftest import PASSWORD_HASH
+
+
+def _column_types(conn, table):
+    return {row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+# Datubāze ar 11. versijas shēmu: REAL summas, 2020. gads arhīvā vecā formāta failā
+@pytest.fixture
+def legacy(database, monkeypatch):
+    with monkeypatch.context() as m:
+        m.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:11])
+        assert migrations.migrate() == 11
+    repository.create_user("tester", PASSWORD_HASH)
+    user_id = repository.find_user("tester")[0]
+    for month in ("2020-03", "2025-03"):
+        for day in range(1, 4):
+            repository.add_transaction(user_id, "expense", 0.125, "kafija", f"{month}-{day:02d}")
+    last_id = repository.add_transaction(user_id, "income", 100.0, "alga", "2025-03-10")
+    repository.set_budget_limit(user_id, "2025-03", 12.5)
+    with db.connection() as conn:
+        conn.execute("DELETE FROM transactions WHERE id = ?", (last_id,))
+        conn.commit()
+    archive.archive_year(2020)
+
+    with db.connection() as conn:
+        (file,) = [file for _, file, _ in archive._groups(conn)]
+    path = os.path.join(archive.archive_dir(), file)
+    os.chmod(path, stat.S_IRUSR | stat.S_IWUSR)
+    old = sqlite3.connect(path)
+    old.execute("PRAGMA user_version = 1")
+    old.commit()
+    old.close()
+    os.chmod(path, stat.S_IRUSR)
+    return user_id, last_id
+
+
+def test_real_amounts_become_cents(legacy):
+    user_id, last_id = legacy
+    assert migrations.migrate() == len(migrations.MIGRATIONS)
+
+    with db.connection() as conn:
+        assert _column_types(conn, "transactions")["amount"] == "INTEGER"
+        assert _column_types(conn, "budget_limits")["limit_amount"] == "INTEGER"
+        assert {column: kind for column, kind in _column_types(conn, "monthly_totals").items()
+                if column in ("income", "expense")} == {"income": "INTEGER", "expense": "INTEGER"}
+        assert conn.execute('''SELECT DISTINCT amount, typeof(amount) FROM main.transactions''').fetchall() == \
+            [(13, "integer")]
+        assert conn.execute('''SELECT month, income, expense, count FROM monthly_totals
+                            ORDER BY month''').fetchall() == [("2020-03", 0, 39, 3), ("2025-03", 0, 39, 3)]
+        (years, file, generation), = archive._groups(conn)
+        assert (years, generation) == ([2020], 2)
+
+    archived = sqlite3.connect(os.path.join(archive.archive_dir(), file))
+    try:
+        assert archived.execute("PRAGMA user_version").fetchone()[0] == archive.ARCHIVE_FORMAT
+        assert archived.execute("SELECT DISTINCT amount, typeof(amount) FROM transactions").fetchall() == \
+            [(13, "integer")]
+    finally:
+        archived.close()
+
+    assert repository.budget_limit(user_id, "2025-03") == 1250
+    assert repository.summary(user_id, "2020-03")["total_expense"] == 39
+    assert repository.lifetime_totals(user_id) == (0, 78)
+
+
+# Pēc pārbūves paliek AUTOINCREMENT skaitītājs, trigeri un meklēšanas indekss
+def test_rebuilt_tables_keep_sequence_triggers_and_search(legacy):
+    user_id, last_id = legacy
+    migrations.migrate()
+
+    new_id = repository.add_transaction(user_id, "income", 1000, "alga", "2025-03-20")
+    assert new_id > last_id
+    assert repository.summary(user_id, "2025-03")["total_income"] == 1000
+    assert len(repository.search_transactions(user_id, "kafija", 10)) == 6
+    assert len(repository.search_transactions(user_id, "alga", 10)) == 1
+
+    totals = analytics.range_totals(user_id)
+    assert (totals["income"], totals["expense"], totals["count"]) == (10.0, 0.78, 7)
+
+
+def test_migration_is_idempotent(legacy):
+    version = migrations.migrate()
+    assert migrations.migrate() == version
+    with db.connection() as conn:
+        assert conn.execute("SELECT SUM(expense) FROM monthly_totals").fetchone()[0] == 78
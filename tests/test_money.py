@@ -0,0 +1,86 @@
+# Money: eiro ievades pārveide centos, robežgadījumi un noraidīšana kā parasta ievades kļūda
+from decimal import Decimal
+
+import pytest
+
+import api
+import importer
+import repository
+import sessions
+from money import MAX_CENTS, Money, euros
+
+
+@pytest.mark.parametrize("value, cents", [
+    ("12.30", 1230),
+    ("12,30", 1230),
+    (" 1 000.50 ", 100050),
+    ("-12,30", -1230),
+    (12.3, 1230),
+    (0.29, 29),
+    (0.125, 13),
+    (-0.125, -13),
+    (Decimal("0.005"), 1),
+    (12, 1200),
+    ("0", 0),
+    (MAX_CENTS / 100, MAX_CENTS - 1),
+    (Money(1230), 1230),
+])
+def test_parse_rounds_to_cents(value, cents):
+    amount = Money.parse(value)
+    assert isinstance(amount, Money)
+    assert amount == cents
+
+
+@pytest.mark.parametrize("value", [
+    "", "abc", "12.3.4", None, True, [], float("nan"), float("inf"), "-inf", "NaN",
+    1e20, 1e30, 1e308, -1e308, "1e400", Decimal("1e30"), 10 ** 30, (MAX_CENTS + 1) / 100 + 1,
+])
+def test_parse_rejects_with_value_error(value):
+    with pytest.raises(ValueError):
+        Money.parse(value)
+
+
+def test_formatting_and_arithmetic():
+    amount = Money(1230)
+    assert str(amount) == "12.30"
+    assert str(Money(-5)) == "-0.05"
+    assert f"{amount}" == "12.30"
+    assert f"{amount:.1f}" == "12.3"
+    assert amount.euros == euros(1230) == 12.3
+    assert isinstance(amount + Money(1), Money)
+    assert isinstance(sum([Money(1), Money(2)]), Money)
+    assert isinstance(-amount, Money) and -amount == -1230
+    assert repr(amount - 1300) == "Money('-0.70')"
+
+
+@pytest.mark.parametrize("amount", [1e308, 1e20, float("inf"), 0, -1, "12", True, None])
+def test_validate_transaction_rejects_bad_amounts(amount):
+    with pytest.raises(ValueError):
+        repository.validate_transaction("expense", amount, "kafija", "2025-03-01")
+
+
+def test_validate_transaction_returns_cents():
+    assert repository.validate_transaction("income", 12.3, " alga ", "2025-03-01") == \
+        ("income", 1230, "alga", "2025-03-01")
+
+
+def test_importer_rejects_oversized_excel_cell():
+    with pytest.raises(ValueError):
+        importer.normalize({"date": "2025-03-01", "amount": 1e30, "description": "kafija"})
+    assert importer.normalize({"date": "2025-03-01", "amount": "-12,30", "description": "kafija"}) == \
+        ("expense", 1230, "kafija", "2025-03-01")
+
+
+# Pārāk liela summa ir noraidīta rinda, nevis 500 kļūda visam pieprasījumam
+def test_ingest_rejects_oversized_amount_row(user_id):
+    token, _ = sessions.issue_token(user_id)
+    client = api.create_app().test_client()
+    response = client.post("/api/transactions", headers={"Authorization": f"Bearer {token}"}, json=[
+        {"type": "expense", "amount": 1e308, "description": "liela"},
+        {"type": "expense", "amount": 1e20, "description": "liela"},
+        {"type": "income", "amount": 12.3, "description": "alga", "date": "2025-03-01"},
+    ])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body["accepted"], body["rejected"]) == (1, 2)
+    assert repository.lifetime_totals(user_id) == (1230, 0)
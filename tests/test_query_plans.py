@@ -0,0 +1,104 @@
+# EXPLAIN QUERY PLAN pārbaudes: kopsavilkuma, saraksta kārtošanas un keyset lapošanas vaicājumi izmanto
+# indeksus un nekārto rindas pagaidu B-kokā. Pārbaudīti tiek tieši repository izpildītie vaicājumi
+import archive
+import db
+import repository
+
+SORT_INDEXES = {
+    ("type", "date", "amount", "id"): "idx_transactions_user_type_date",
+    ("amount", "id"): "idx_transactions_user_amount",
+    ("description", "id"): "idx_transactions_user_description",
+    ("date", "id"): "idx_transactions_user_date",
+}
+
+
+def _seed(user_id, count=300):
+    repository.insert_transactions([
+        (user_id, ("income", "expense")[i % 2], 100 + i, f"pirkums {i}",
+         f"{2023 + i % 3}-{1 + i % 12:02d}-{1 + i % 28:02d}", None)
+        for i in range(count)])
+
+
+# Izpilda fn un atgriež {sql: [(id, parent, detail)]} tā SELECT vaicājumiem pār transakcijām un kopsummām.
+# Ligzdoti db.connection() izsaukumi tajā pašā pavedienā izmanto to pašu savienojumu, tāpēc trace redz visus
+def _plans(fn, *args):
+    statements = []
+    with db.connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            result = fn(*args)
+            if hasattr(result, "__next__"):
+                list(result)
+        finally:
+            conn.set_trace_callback(None)
+        plans = {}
+        for sql in statements:
+            if not sql.lstrip().upper().startswith("SELECT") or "FROM archives" in sql:
+                continue
+            plans[sql] = [(row[0], row[1], row[3]) for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    assert plans, "neviens vaicājums netika izpildīts"
+    return plans
+
+
+def _details(plan):
+    return [detail for _, _, detail in plan]
+
+
+# Apakšvaicājuma mezgli (piemēram, "MATERIALIZE w") bez ārējā vaicājuma
+def _subtree(plan, detail):
+    root = next(node for node, _, text in plan if text.startswith(detail))
+    nodes, found = {root}, []
+    for node, parent, text in plan:
+        if parent in nodes:
+            nodes.add(node)
+            found.append(text)
+    return found
+
+
+def test_summary_uses_primary_key_and_unique_index(user_id):
+    _seed(user_id)
+    repository.set_budget_limit(user_id, "2025-03", 50000)
+    plans = _plans(repository.summary, user_id, "2025-03")
+    details = [detail for plan in plans.values() for detail in _details(plan)]
+    assert any("USING INDEX idx_budget_limits_user_month" in detail for detail in details)
+    assert any("monthly_totals USING PRIMARY KEY (user_id=? AND month=?)" in detail for detail in details)
+    assert all(detail.startswith("SEARCH") for detail in details)
+    assert not any("TEMP B-TREE" in detail for detail in details)
+
+
+def test_window_sort_reads_ids_from_covering_index(user_id):
+    _seed(user_id)
+    for order_keys, index in SORT_INDEXES.items():
+        for descending in (False, True):
+            plans = _plans(repository.transaction_window, user_id, order_keys, descending, 20, 40)
+            (plan,) = plans.values()
+            # Ārējais ORDER BY kārto tikai loga (limit) rindas, kas nolasītas pēc id
+            window = _subtree(plan, "MATERIALIZE")
+            assert any(f"USING COVERING INDEX {index} (user_id=?)" in detail for detail in window), window
+            assert not any("TEMP B-TREE" in detail for detail in window), window
+
+
+def test_keyset_pages_follow_date_index(user_id):
+    _seed(user_id)
+    filters = [
+        repository.transaction_filter(user_id),
+        repository.transaction_filter(user_id, after=("2024-01-01", 5)),
+        repository.transaction_filter(user_id, date_from="2024-02-01", date_to="2024-03-01"),
+        repository.transaction_filter(user_id, after=("2024-01-01", 5), date_to="2025-06-01", trans_type="income"),
+    ]
+    for transaction_filter in filters:
+        for fn in (repository.iter_transaction_chunks, repository.next_transaction_cursor):
+            for sql, plan in _plans(fn, transaction_filter, 50).items():
+                details = _details(plan)
+                assert any("INDEX idx_transactions_user_date (user_id=?" in detail for detail in details), sql
+                assert not any("TEMP B-TREE" in detail for detail in details), sql
+
+
+def test_keyset_merges_archived_partitions_without_sorting(user_id):
+    _seed(user_id)
+    archive.archive_year(2023)
+    for sql, plan in _plans(repository.iter_transaction_chunks, repository.transaction_filter(user_id), 50).items():
+        details = _details(plan)
+        assert "MERGE (UNION ALL)" in details
+        assert sum("USING INDEX idx_transactions_user_date (user_id=?)" in detail for detail in details) == 2
+        assert not any("TEMP B-TREE" in detail for detail in details), sql
@@ -0,0 +1,103 @@
+# API sesiju marķieri: paraksts, derīguma termiņš un atsaukšana (arī cita darba procesa atsaukums)
+import time
+from collections import OrderedDict
+
+import pytest
+
+import api
+import auth
+import repository
+import sessions
+from cache import LRUCache
+
+
+@pytest.fixture
+def client(migrated, monkeypatch):
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", 4)
+    monkeypatch.setattr(api, "summary_cache", LRUCache())
+    repository.create_user("anna", auth.hash_password("parole123"))
+    return api.create_app().test_client()
+
+
+def _login(client, password="parole123"):
+    return client.post("/api/login", json={"username": "anna", "password": password})
+
+
+def _summary(client, token):
+    return client.get("/api/summary", headers={"Authorization": f"Bearer {token}"})
+
+
+def _forget_revocations(monkeypatch):
+    monkeypatch.setattr(sessions, "_revoked", OrderedDict())
+    monkeypatch.setattr(sessions, "_revoked_seq", 0)
+    monkeypatch.setattr(sessions, "_refreshed_at", None)
+
+
+def test_issued_token_verifies(user_id):
+    token, expires = sessions.issue_token(user_id)
+    assert sessions.verify_token(token) == user_id
+    assert expires > time.time()
+
+
+@pytest.mark.parametrize("tamper", [
+    lambda token: "999" + token[token.index("."):],
+    lambda token: token.replace(".", ".1", 1),
+    lambda token: token[:-2] + ("AA" if not token.endswith("AA") else "BB"),
+    lambda token: token.rpartition(".")[0],
+    lambda token: "",
+    lambda token: "a.b.c.d",
+])
+def test_tampered_token_is_rejected(user_id, tamper):
+    token, _ = sessions.issue_token(user_id)
+    assert sessions.verify_token(tamper(token)) is None
+
+
+def test_token_signed_with_other_key_is_rejected(user_id, monkeypatch):
+    token, _ = sessions.issue_token(user_id)
+    monkeypatch.setattr(sessions, "_key", b"cita-atslega")
+    assert sessions.verify_token(token) is None
+
+
+def test_expired_token_is_rejected(user_id, monkeypatch):
+    token, expires = sessions.issue_token(user_id, ttl=60)
+    assert sessions.verify_token(token) == user_id
+    monkeypatch.setattr(time, "time", lambda: expires + 1)
+    assert sessions.verify_token(token) is None
+
+
+def test_revoked_token_is_rejected(user_id):
+    token, _ = sessions.issue_token(user_id)
+    other, _ = sessions.issue_token(user_id)
+    assert sessions.revoke_token(token)
+    assert sessions.verify_token(token) is None
+    assert sessions.verify_token(other) == user_id
+    assert not sessions.revoke_token("nav.marķieris")
+
+
+# Cits darba process zina tikai datubāzē ierakstīto atsaukumu
+def test_revocation_reaches_other_workers(user_id, monkeypatch):
+    token, _ = sessions.issue_token(user_id)
+    assert sessions.verify_token(token) == user_id
+    sessions.revoke_token(token)
+    _forget_revocations(monkeypatch)
+    assert sessions.verify_token(token) is None
+
+
+def test_api_requires_valid_token(client, monkeypatch):
+    assert _login(client, "nepareiza").status_code == 401
+    response = _login(client)
+    assert response.status_code == 200
+    token = response.get_json()["token"]
+
+    assert _summary(client, token).status_code == 200
+    assert client.get("/api/summary").status_code == 401
+    assert _summary(client, token[:-1] + ("A" if token[-1] != "A" else "B")).status_code == 401
+    assert client.get(f"/api/summary?user_id={response.get_json()['user_id']}").status_code == 401
+
+    logout = client.post("/api/logout", headers={"Authorization": f"Bearer {token}"})
+    assert logout.status_code == 204
+    assert _summary(client, token).status_code == 401
+
+    fresh = _login(client).get_json()["token"]
+    monkeypatch.setattr(time, "time", lambda: sessions._parse(fresh)[1] + 1)
+    assert _summary(client, fresh).status_code == 401
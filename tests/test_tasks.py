@@ -0,0 +1,87 @@
+# TaskExecutor bez Tk: viltots root izpilda ieplānotās after() funkcijas pēc pieprasījuma
+import threading
+
+from tasks import TaskExecutor
+
+
+class FakeRoot:
+    def __init__(self):
+        self.scheduled = []
+        self.reported = []
+
+    def after(self, delay, fn):
+        self.scheduled.append(fn)
+
+    def report_callback_exception(self, exc_type, exc, tb):
+        self.reported.append(exc)
+
+    # Izpilda ieplānotās apstrādes, līdz neviena vairs nav ieplānota
+    def run(self):
+        while self.scheduled:
+            self.scheduled.pop(0)()
+
+
+def _executor():
+    root = FakeRoot()
+    return root, TaskExecutor(root, max_threads=2)
+
+
+def test_results_are_delivered_after_failing_callback():
+    root, executor = _executor()
+    results = []
+
+    def fail(result):
+        raise RuntimeError("apstrādātāja kļūda")
+
+    try:
+        executor.submit(lambda: 1, on_done=fail)
+        executor.submit(lambda: 2, on_done=results.append)
+        root.run()
+        assert [str(error) for error in root.reported] == ["apstrādātāja kļūda"]
+        assert results == [2]
+
+        executor.submit(lambda: 3, on_done=results.append)
+        assert len(root.scheduled) == 1
+        root.run()
+        assert results == [2, 3]
+    finally:
+        executor.shutdown()
+
+
+def test_failing_error_handler_keeps_polling():
+    root, executor = _executor()
+    errors, results = [], []
+
+    def fail(error):
+        errors.append(error)
+        raise RuntimeError("kļūdu apstrādātāja kļūda")
+
+    def boom():
+        raise ValueError("uzdevuma kļūda")
+
+    try:
+        executor.submit(boom, on_error=fail)
+        root.run()
+        assert [str(error) for error in errors] == ["uzdevuma kļūda"]
+        assert len(root.reported) == 1
+
+        executor.submit(lambda: 4, on_done=results.append)
+        root.run()
+        assert results == [4]
+    finally:
+        executor.shutdown()
+
+
+def test_cancelled_task_result_is_ignored():
+    root, executor = _executor()
+    results = []
+    release = threading.Event()
+    try:
+        task = executor.submit(release.wait, on_done=results.append)
+        task.cancel()
+        release.set()
+        root.run()
+        assert results == []
+        assert not root.reported
+    finally:
+        executor.shutdown()